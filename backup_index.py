@@ -0,0 +1,129 @@
+"""
+backup_index.py — per-title metadata for the backups in backupHistory/<TITLEID>-<Name>/.
+
+index.json lists every backup in the folder, oldest first:
+    {"version": 1, "backups": [{"name", "created", "source", "size", "file_count",
+                                "archive_size", "fingerprint"}, ...]}
+so retention, listing and "is this state already backed up?" never open an archive.
+`size` is the save's total file size; `archive_size` what the backup takes on disk.
+
+The index is written atomically. If it is missing, unreadable, or no longer lists
+exactly the saveBackup_* files present, it is rebuilt from the archives themselves
+(zip comments written by SyncEngine, or hashing the members of older zips).
+"""
+
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import content_hash
+from blob_store import read_manifest
+
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+BACKUP_PATTERNS = ("saveBackup_*.zip", "saveBackup_*.json")
+
+
+class BackupIndex:
+    def __init__(self, folder: Path, algorithm: str = content_hash.DEFAULT_ALGORITHM):
+        self.folder = folder
+        self.path = folder / INDEX_NAME
+        # Fingerprint algorithm used when an old archive has to be rehashed
+        self.algorithm = algorithm
+        self.backups: List[Dict] = []
+        self.load()
+
+    def load(self):
+        on_disk = {p.name for pattern in BACKUP_PATTERNS for p in self.folder.glob(pattern)}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if (isinstance(raw, dict) and raw.get('version') == INDEX_VERSION
+                    and isinstance(raw.get('backups'), list)
+                    and {b.get('name') for b in raw['backups']} == on_disk):
+                self.backups = raw['backups']
+                return
+        except Exception:
+            pass
+        if on_disk or self.path.exists():
+            self.rebuild(on_disk)
+
+    def save(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'backups': self.backups}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def rebuild(self, names=None):
+        if names is None:
+            names = {p.name for pattern in BACKUP_PATTERNS for p in self.folder.glob(pattern)}
+        print(f"  ℹ️ Rebuilding backup index for {self.folder.name}")
+        backups = []
+        for name in names:
+            try:
+                backups.append(self._describe(self.folder / name))
+            except Exception as e:
+                print(f"  ⚠️ Could not read backup {name}: {e}")
+                continue
+        backups.sort(key=lambda b: b['created'])
+        self.backups = backups
+        try:
+            self.save()
+        except OSError as e:
+            print(f"  ⚠️ Could not write backup index {self.path}: {e}")
+
+    def add(self, record: Dict):
+        self.backups.append(record)
+        self.backups.sort(key=lambda b: b['created'])
+
+    def remove(self, name: str):
+        self.backups = [b for b in self.backups if b['name'] != name]
+
+    def latest(self, source: Optional[str] = None) -> Optional[Dict]:
+        """Newest backup, optionally only among those taken from `source` ('ryujinx'/'citron')."""
+        for record in reversed(self.backups):
+            if source is None or record.get('source') == source:
+                return record
+        return None
+
+    def _describe(self, path: Path) -> Dict:
+        st = path.stat()
+        record = {'name': path.name, 'created': st.st_mtime, 'source': None, 'size': 0,
+                  'file_count': 0, 'archive_size': st.st_size, 'fingerprint': None}
+        if path.suffix == '.json':
+            manifest = read_manifest(path)
+            files = {rel: (size, digest) for rel, (size, digest) in manifest['files'].items()}
+            record['source'] = manifest.get('source')
+            algorithm = manifest.get('algorithm') or self.algorithm
+        else:
+            files = {}
+            with zipfile.ZipFile(path) as zf:
+                meta = _zip_meta(zf)
+                record['source'] = meta.get('source')
+                infos = [i for i in zf.infolist() if not i.is_dir()]
+                if meta.get('fingerprint'):
+                    record.update(size=sum(i.file_size for i in infos), file_count=len(infos),
+                                  fingerprint=meta['fingerprint'])
+                    return record
+                # Archive from before the index existed: hash its members once
+                algorithm = self.algorithm
+                for info in infos:
+                    h = content_hash.new_hash(algorithm)
+                    with zf.open(info) as fh:
+                        content_hash.update_from_stream(h, fh)
+                    files[info.filename] = (info.file_size, content_hash.tag(algorithm, h.hexdigest()))
+        record['size'] = sum(size for size, _ in files.values())
+        record['file_count'] = len(files)
+        record['fingerprint'] = content_hash.fingerprint(files, algorithm) if files else None
+        return record
+
+
+def _zip_meta(zf: zipfile.ZipFile) -> Dict:
+    try:
+        meta = json.loads(zf.comment.decode('utf-8')) if zf.comment else {}
+    except ValueError:
+        return {}
+    return meta if isinstance(meta, dict) else {}
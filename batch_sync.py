@@ -0,0 +1,152 @@
+"""
+batch_sync.py — run many SyncEngine.sync() / backup calls concurrently.
+
+Independent titles are synced on a bounded thread pool (Config.sync_workers).
+Jobs whose destinations overlap are serialized with a per-destination lock; a Ryujinx
+slot destination locks its whole <folder id> directory, because a sync writes every
+numeric sibling slot there.
+Results come back in job order, each with the time spent syncing that title.
+
+BatchBackupExecutor does the same for Backup All (Config.backup_workers): archives are
+built concurrently (zlib and hashing release the GIL, so threads use every core) and
+retention runs once per title when the batch is done.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from models import BackupResult, SaveEntry, SyncJob, SyncResult
+from syncengine import SyncEngine
+
+# Called from worker threads as each job finishes: (result, finished, total)
+ResultCallback = Callable[[SyncResult, int, int], None]
+BackupCallback = Callable[[BackupResult, int, int], None]
+
+
+class BatchSyncExecutor:
+    def __init__(self, engine: SyncEngine, workers: Optional[int] = None):
+        self.engine = engine
+        if workers is None:
+            workers = getattr(engine.config, 'sync_workers', 1)
+        self.workers = max(1, int(workers or 1))
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def run(self, jobs: List[SyncJob], on_result: Optional[ResultCallback] = None,
+            cancel: Optional[threading.Event] = None) -> List[SyncResult]:
+        """Sync every job and return one SyncResult per job, in job order.
+
+        A job that has not started when `cancel` is set is reported as 'cancelled';
+        syncs already running are allowed to finish so no destination is left half-written.
+        """
+        total = len(jobs)
+        finished = 0
+        counter = threading.Lock()
+
+        def run_one(job: SyncJob) -> SyncResult:
+            nonlocal finished
+            result = self._run_job(job, cancel)
+            with counter:
+                finished += 1
+                done = finished
+            if on_result:
+                on_result(result, done, total)
+            return result
+
+        if self.workers <= 1 or total <= 1:
+            return [run_one(job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=min(self.workers, total), thread_name_prefix='batch-sync') as pool:
+            return list(pool.map(run_one, jobs))
+
+    def _run_job(self, job: SyncJob, cancel: Optional[threading.Event]) -> SyncResult:
+        title_id = job.destination.title_id
+        with self._lock_for(job.destination):
+            if cancel is not None and cancel.is_set():
+                return SyncResult(title_id, 'cancelled')
+            start = time.perf_counter()
+            try:
+                result = self.engine.sync(job.source, job.destination)
+            except Exception as e:
+                print(f"  ❌ Sync failed for {job.destination.game_name} ({title_id}): {e}")
+                result = SyncResult(title_id, 'failed', error=str(e))
+            result.duration = time.perf_counter() - start
+            return result
+
+    def _lock_for(self, destination: SaveEntry) -> threading.Lock:
+        key = str(self.lock_path(destination))
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def lock_path(destination: SaveEntry) -> Path:
+        """Directory a sync into `destination` may modify."""
+        path = destination.path.absolute()
+        if destination.source == 'ryujinx' and path.name.isdigit():
+            return path.parent
+        return path
+
+
+class BatchBackupExecutor:
+    def __init__(self, engine: SyncEngine, workers: Optional[int] = None):
+        self.engine = engine
+        if workers is None:
+            workers = getattr(engine.config, 'backup_workers', 0)
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+
+    def run(self, entries: List[SaveEntry], on_result: Optional[BackupCallback] = None,
+            cancel: Optional[threading.Event] = None) -> List[BackupResult]:
+        """Back up every entry and return one BackupResult per entry, in order.
+
+        Entries not started when `cancel` is set are reported as 'cancelled'. Retention
+        (and blob garbage collection) runs afterwards for every title that got a backup.
+        """
+        total = len(entries)
+        finished = 0
+        counter = threading.Lock()
+
+        def run_one(entry: SaveEntry) -> BackupResult:
+            nonlocal finished
+            result = self._backup(entry, cancel)
+            with counter:
+                finished += 1
+                done = finished
+            if on_result:
+                on_result(result, done, total)
+            return result
+
+        if self.workers <= 1 or total <= 1:
+            results = [run_one(entry) for entry in entries]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, total), thread_name_prefix='batch-backup') as pool:
+                results = list(pool.map(run_one, entries))
+
+        titles = {(r.entry.title_id, r.entry.game_name) for r in results if r.status == 'backed_up'}
+        needs_gc = False
+        for title_id, game_name in sorted(titles):
+            try:
+                needs_gc |= self.engine.enforce_retention(title_id, game_name, collect_garbage=False)
+            except Exception as e:
+                print(f"  ⚠️ Could not apply backup retention for {title_id}: {e}")
+        if needs_gc:
+            self.engine._collect_blob_garbage()
+        return results
+
+    def _backup(self, entry: SaveEntry, cancel: Optional[threading.Event]) -> BackupResult:
+        if cancel is not None and cancel.is_set():
+            return BackupResult(entry, 'cancelled')
+        start = time.perf_counter()
+        try:
+            archive = self.engine._backup(entry, enforce_limit=False)
+            result = BackupResult(entry, 'backed_up' if archive else 'skipped', archive)
+        except Exception as e:
+            print(f"  ❌ Backup failed for {entry.game_name} ({entry.source}): {e}")
+            result = BackupResult(entry, 'failed', error=str(e))
+        result.duration = time.perf_counter() - start
+        return result
@@ -0,0 +1,76 @@
+"""
+bench_hash.py — micro-benchmark for the save content hashing layer.
+
+Compares the legacy MD5 / 8 KiB read() loop with content_hash.hash_file() for each
+supported algorithm on file sizes typical of Switch saves. Data is random, so it is
+incompressible and never served from a deduplicating filesystem cache.
+
+Usage:
+    python bench_hash.py [--sizes 64K,1M,8M,32M] [--repeat 5] [--dir /path/on/target/disk]
+"""
+
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import content_hash
+
+
+def legacy_md5(path: Path) -> str:
+    md5 = hashlib.md5()
+    with path.open('rb') as fh:
+        while True:
+            chunk = fh.read(8192)
+            if not chunk:
+                break
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def bench(fn, path: Path, repeat: int) -> float:
+    fn(path)  # warm the page cache so we measure hashing, not the disk
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='64K,1M,8M,32M')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--dir', default=None, help='directory for the temporary test files')
+    args = parser.parse_args()
+
+    candidates = [('md5 (legacy 8 KiB read)', legacy_md5)]
+    for algorithm in content_hash.ALGORITHMS:
+        candidates.append((algorithm, lambda p, a=algorithm: content_hash.hash_file(p, a)))
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"{'size':>8}  {'algorithm':<26} {'time':>10} {'MB/s':>10}")
+        for size_text in args.sizes.split(','):
+            size = parse_size(size_text)
+            path = Path(tmp) / f"save_{size}.bin"
+            path.write_bytes(os.urandom(size))
+            for label, fn in candidates:
+                elapsed = bench(fn, path, args.repeat)
+                rate = size / elapsed / 1e6 if elapsed else float('inf')
+                print(f"{size_text:>8}  {label:<26} {elapsed * 1000:>8.2f}ms {rate:>10.1f}")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+blob_store.py — content-addressed file store behind deduplicated backups.
+
+Each distinct file content is kept once, named by its tagged digest:
+    <root>/<algorithm>/<first two hex chars>/<hexdigest>
+A backup is then just a small JSON manifest (relative path -> [size, digest]) written
+next to the zip backups, so unchanged files cost nothing across versions and titles.
+
+Blobs are written to a temp file and renamed into place, and are named by the digest
+computed while copying — never by a cached value — so a blob's name always matches
+its bytes. Unreferenced blobs are removed by collect_garbage().
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import content_hash
+
+MANIFEST_VERSION = 1
+
+
+class BlobStore:
+    def __init__(self, root: Path):
+        self.root = root
+        # Digests referenced by backups still being written; garbage collection skips them.
+        # Pinning and the existence check happen under the lock so a concurrent GC can never
+        # delete a blob between "it exists, reuse it" and the manifest being written.
+        self._lock = threading.Lock()
+        self._pins: Counter = Counter()
+
+    def blob_path(self, digest: str) -> Path:
+        algorithm, _, hexdigest = digest.partition(':')
+        return self.root / algorithm / hexdigest[:2] / hexdigest
+
+    def store_file(self, path: Path, algorithm: str, known_digest: Optional[str] = None) -> Tuple[str, bool]:
+        """Add a file's content to the store and pin it; returns (digest, whether a new blob was written).
+
+        With `known_digest` (e.g. from the hash cache) an existing blob is reused without
+        reading the file at all. Call release() with the returned digests once the backup
+        manifest referencing them is on disk.
+        """
+        if known_digest is not None:
+            with self._lock:
+                if self.blob_path(known_digest).is_file():
+                    self._pins[known_digest] += 1
+                    return known_digest, False
+
+        tmp_dir = self.root / 'tmp'
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+        tmp = Path(tmp_name)
+        try:
+            with os.fdopen(fd, 'wb') as out, open(path, 'rb', buffering=0) as src:
+                digest, _ = content_hash.copy_and_hash(src, out, algorithm)
+            with self._lock:
+                self._pins[digest] += 1
+                target = self.blob_path(digest)
+                if target.is_file():
+                    tmp.unlink()
+                    return digest, False
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, target)
+            return digest, True
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def release(self, digests: Iterable[str]):
+        with self._lock:
+            for digest in digests:
+                self._pins[digest] -= 1
+                if self._pins[digest] <= 0:
+                    del self._pins[digest]
+
+    def collect_garbage(self, referenced: Callable[[], Set[str]]) -> Tuple[int, int]:
+        """Delete every blob that is neither pinned nor in `referenced()`; returns (blobs removed, bytes freed).
+
+        `referenced` is called with the store locked, so a backup that finished (wrote its
+        manifest and released its pins) just before is always accounted for.
+        """
+        removed = freed = 0
+        with self._lock:
+            keep = referenced()
+            for digest, path in self._iter_blobs():
+                if digest in keep or digest in self._pins:
+                    continue
+                try:
+                    size = path.stat().st_size
+                    path.unlink()
+                except OSError:
+                    continue
+                removed += 1
+                freed += size
+        return removed, freed
+
+    def _iter_blobs(self) -> Iterator[Tuple[str, Path]]:
+        if not self.root.is_dir():
+            return
+        for algo_dir in self.root.iterdir():
+            if algo_dir.name not in content_hash.ALGORITHMS or not algo_dir.is_dir():
+                continue
+            for fan_dir in algo_dir.iterdir():
+                if not fan_dir.is_dir():
+                    continue
+                for blob in fan_dir.iterdir():
+                    yield content_hash.tag(algo_dir.name, blob.name), blob
+
+
+def write_manifest(path: Path, meta: Dict, files: Dict[str, List]):
+    """Atomically write a backup manifest: `meta` fields plus `files` (rel -> [size, digest])."""
+    data = dict(meta, version=MANIFEST_VERSION, files=files)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def read_manifest(path: Path) -> Dict:
+    """Load a backup manifest (raises ValueError if it is not one this version understands)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION or not isinstance(data.get('files'), dict):
+        raise ValueError(f"Unrecognised backup manifest: {path}")
+    return data
@@ -0,0 +1,377 @@
+"""
+cli.py — headless command-line interface (no Tk, no display server needed).
+
+    python cli.py [global options] scan
+    python cli.py [global options] status [--unsynced]
+    python cli.py [global options] sync (TITLE_ID ... | --all) --direction {ryu-to-ci,ci-to-ryu,newest} [--dry-run]
+    python cli.py [global options] backup [TITLE_ID ...] [--source {ryujinx,citron}]
+    python cli.py [global options] restore TITLE_ID (--list | --backup NAME | --latest) [--source ...]
+
+Results go to stdout as one JSON document (--format json, the default) or one JSON
+object per line (--format ndjson); progress messages go to stderr (--quiet drops them).
+Emulator paths default to the GUI's last-used paths, then to detected Linux installs.
+
+Exit codes: 0 success, 1 an operation failed, 2 bad usage or configuration.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models import SaveEntry, SyncJob
+from session import SyncSession
+from batch_sync import BatchBackupExecutor, BatchSyncExecutor
+from platform_defaults import detect_linux_defaults
+from save_manifest import classify
+import foldermap
+
+GUI_CONFIG_FILE = Path(".gui_config.json")
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+class CliError(Exception):
+    """Bad usage or configuration (exit code 2)."""
+
+
+class Output:
+    """Collects result records and writes them as JSON (at the end) or NDJSON (as produced)."""
+
+    def __init__(self, stream, fmt: str):
+        self.stream = stream
+        self.fmt = fmt
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def emit(self, record: Dict):
+        with self._lock:
+            if self.fmt == 'ndjson':
+                self.stream.write(json.dumps(record) + "\n")
+                self.stream.flush()
+            else:
+                self.records.append(record)
+
+    def close(self):
+        if self.fmt == 'json':
+            json.dump(self.records, self.stream, indent=2)
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def entry_record(entry: SaveEntry) -> Dict:
+    return {
+        'title_id': entry.title_id,
+        'game_name': entry.game_name,
+        'source': entry.source,
+        'folder_id': entry.folder_id,
+        'path': str(entry.path),
+        'modified_time': entry.modified_time.isoformat(timespec='seconds') if entry.modified_time else None,
+        'hash': entry.hash,
+        'file_count': entry.file_count,
+        'max_file_size': entry.max_file_size,
+    }
+
+
+def resolve_bases(args) -> (Path, Path):
+    ryujinx = Path(args.ryujinx) if args.ryujinx else None
+    citron = Path(args.citron) if args.citron else None
+    if (ryujinx is None or citron is None) and GUI_CONFIG_FILE.exists():
+        try:
+            with open(GUI_CONFIG_FILE, encoding='utf-8') as f:
+                data = json.load(f)
+            ryujinx = ryujinx or (Path(data['ryujinx_base']) if data.get('ryujinx_base') else None)
+            citron = citron or (Path(data['citron_base']) if data.get('citron_base') else None)
+        except Exception:
+            pass
+    if ryujinx is None or citron is None:
+        ryu_detected, citron_detected = detect_linux_defaults()
+        ryujinx = ryujinx or ryu_detected
+        citron = citron or citron_detected
+    if ryujinx is None or citron is None:
+        raise CliError("Emulator paths unknown; pass --ryujinx and --citron")
+    return ryujinx, citron
+
+
+def open_session(args) -> SyncSession:
+    session = SyncSession(Path(args.backup_dir), Path(args.titledb), Path(args.mapping))
+    session.ensure(*resolve_bases(args))
+    if args.citron_user:
+        use_citron_user(session, args.citron_user)
+    return session
+
+
+def use_citron_user(session: SyncSession, user_id: str):
+    """Make `user_id` the Citron user for this run, even if another one was stored by an earlier run.
+
+    The override is not persisted; the GUI keeps its own choice.
+    """
+    folder_map = session.folder_map
+    citron_base = session.config.citron_base
+    # Locates the save base (and answers the several-users prompt with --citron-user)
+    folder_map.resolve_citron_user(citron_base, session.nswdb.known_title_ids())
+    folder_map.cached_citron_user = user_id
+    save_root = folder_map.citron_save_root(citron_base, user_id)
+    if not save_root.is_dir():
+        raise CliError(f"Citron user folder not found: {save_root}")
+
+
+def scan_saves(session: SyncSession, args) -> Dict[str, Dict[str, SaveEntry]]:
+    ryujinx_entries, citron_entries = session.scan(force_rehash=args.rehash)
+    saves: Dict[str, Dict[str, SaveEntry]] = {}
+    for entry in ryujinx_entries + citron_entries:
+        saves.setdefault(entry.title_id, {})[entry.source] = entry
+    return saves
+
+
+def select_titles(saves: Dict, title_ids: List[str], select_all: bool) -> List[str]:
+    if select_all or not title_ids:
+        return sorted(saves)
+    wanted = [t.upper() for t in title_ids]
+    missing = [t for t in wanted if t not in saves]
+    if missing:
+        raise CliError(f"No save found for: {', '.join(missing)}")
+    return wanted
+
+
+def cmd_scan(session: SyncSession, args, out: Output) -> int:
+    saves = scan_saves(session, args)
+    for tid in sorted(saves):
+        for entry in saves[tid].values():
+            out.emit(entry_record(entry))
+    return EXIT_OK
+
+
+def cmd_status(session: SyncSession, args, out: Output) -> int:
+    saves = scan_saves(session, args)
+    for tid in sorted(saves):
+        r = saves[tid].get('ryujinx')
+        c = saves[tid].get('citron')
+        record = {'title_id': tid, 'game_name': (r or c).game_name}
+        record.update(classify(r, c, session.folder_map.get_ryujinx_folder_id(tid) is not None))
+        if args.unsynced and record['status'] == 'match':
+            continue
+        record['ryujinx_modified'] = r.modified_time.isoformat(timespec='seconds') if r else None
+        record['citron_modified'] = c.modified_time.isoformat(timespec='seconds') if c else None
+        out.emit(record)
+    return EXIT_OK
+
+
+def sync_job(session: SyncSession, sources: Dict[str, SaveEntry], direction: str) -> (Optional[SyncJob], str, str):
+    """Build the SyncJob for one title; returns (job, '', '') or (None, status, reason).
+
+    status is 'skipped' when the newest-wins policy has nothing to copy and
+    'not_synced' when the requested sync cannot be done.
+    """
+    r = sources.get('ryujinx')
+    c = sources.get('citron')
+    if direction == 'newest':
+        if not (r and c):
+            return None, 'skipped', "save exists on one side only; use an explicit --direction"
+        if r.modified_time == c.modified_time:
+            return None, 'skipped', "both saves have the same modification time"
+        direction = 'ryu-to-ci' if r.modified_time > c.modified_time else 'ci-to-ryu'
+
+    if direction == 'ryu-to-ci':
+        source, existing = r, c
+        if not r:
+            return None, 'not_synced', "no Ryujinx save to copy from"
+    else:
+        source, existing = c, r
+        if not c:
+            return None, 'not_synced', "no Citron save to copy from"
+    # Same destinations as the GUI's syncs
+    destination, reason = session.sync_destination(source, existing)
+    if destination is None:
+        return None, 'not_synced', reason
+    return SyncJob(source, destination), '', ''
+
+
+def cmd_sync(session: SyncSession, args, out: Output) -> int:
+    if not args.all and not args.title_ids:
+        raise CliError("Give one or more TITLE_IDs or --all")
+    saves = scan_saves(session, args)
+    jobs = []
+    failed = False
+    for tid in select_titles(saves, args.title_ids, args.all):
+        job, status, reason = sync_job(session, saves[tid], args.direction)
+        if job is None:
+            # A title named on the command line that cannot be synced is a failure;
+            # under --all, and for newest-wins skips, it is just reported
+            if status == 'not_synced' and not args.all:
+                failed = True
+            out.emit({'title_id': tid, 'status': status, 'reason': reason})
+            continue
+        if args.dry_run:
+            out.emit({'title_id': tid, 'status': 'would_sync', 'from': job.source.source,
+                      'to': job.destination.source, 'destination': str(job.destination.path)})
+            continue
+        jobs.append(job)
+
+    def on_result(result, done, total):
+        nonlocal failed
+        failed |= result.status == 'failed'
+        record = {'title_id': result.title_id, 'status': result.status,
+                  'destinations': [str(d) for d in result.destinations],
+                  'duration': round(result.duration, 3)}
+        if result.error:
+            record['error'] = result.error
+        out.emit(record)
+
+    if jobs:
+        BatchSyncExecutor(session.engine, args.workers).run(jobs, on_result=on_result)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_backup(session: SyncSession, args, out: Output) -> int:
+    saves = scan_saves(session, args)
+    entries = [entry for tid in select_titles(saves, args.title_ids, False)
+               for source, entry in sorted(saves[tid].items()) if args.source in (None, source)]
+    failed = False
+
+    def on_result(result, done, total):
+        nonlocal failed
+        failed |= result.status == 'failed'
+        record = {'title_id': result.entry.title_id, 'source': result.entry.source, 'status': result.status,
+                  'archive': str(result.archive) if result.archive else None,
+                  'duration': round(result.duration, 3)}
+        if result.error:
+            record['error'] = result.error
+        out.emit(record)
+
+    BatchBackupExecutor(session.engine, args.workers).run(entries, on_result=on_result)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def cmd_restore(session: SyncSession, args, out: Output) -> int:
+    saves = scan_saves(session, args)
+    tid = args.title_id.upper()
+    sources = saves.get(tid)
+    if not sources:
+        raise CliError(f"No save found for: {tid}")
+    game_name = next(iter(sources.values())).game_name
+    # Backups made before the index recorded their emulator have no source; --source does not hide them
+    backups = [b for b in session.engine.list_backups(tid, game_name)
+               if args.source is None or b.get('source') in (None, args.source)]
+
+    if args.list:
+        for b in backups:
+            out.emit(dict(b, title_id=tid))
+        return EXIT_OK
+
+    if args.latest:
+        if not backups:
+            raise CliError(f"No backups for {tid}")
+        backup = backups[0]
+    else:
+        backup = next((b for b in backups if b['name'] == args.backup), None)
+        if backup is None:
+            raise CliError(f"No backup named {args.backup} for {tid}")
+    source = backup.get('source') or args.source
+    if source is None:
+        if len(sources) != 1:
+            raise CliError(f"Backup {backup['name']} does not record which emulator it came from; "
+                           "pass --source ryujinx or --source citron")
+        source = next(iter(sources))
+    target = sources.get(source)
+    if target is None:
+        raise CliError(f"No {source} save of {tid} to restore into")
+
+    try:
+        result = session.engine.restore(target, backup['name'])
+    except Exception as e:
+        out.emit({'title_id': tid, 'backup': backup['name'], 'status': 'failed', 'error': str(e)})
+        return EXIT_FAILED
+    out.emit({'title_id': tid, 'backup': backup['name'], 'status': result.status,
+              'destinations': [str(d) for d in result.destinations]})
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='cli.py', description="Switch emulator save sync (headless)")
+    parser.add_argument('--ryujinx', help="Ryujinx base directory")
+    parser.add_argument('--citron', help="Citron base directory")
+    parser.add_argument('--citron-user', help="Citron user folder id to use when several are found")
+    parser.add_argument('--backup-dir', default='./backupHistory')
+    parser.add_argument('--titledb', default='US.en.json', help="titledb JSON (siblings are loaded too)")
+    parser.add_argument('--mapping', default='folder_mapping.json')
+    parser.add_argument('--format', choices=('json', 'ndjson'), default='json')
+    parser.add_argument('--rehash', action='store_true', help="ignore cached file digests while scanning")
+    parser.add_argument('--workers', type=int, default=None, help="parallel syncs/backups (default: from Config)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="no progress messages on stderr")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    sub.add_parser('scan', help="list every save found")
+
+    p = sub.add_parser('status', help="compare each title's Ryujinx and Citron saves")
+    p.add_argument('--unsynced', action='store_true', help="omit titles that already match")
+
+    p = sub.add_parser('sync', help="copy saves between emulators")
+    p.add_argument('title_ids', nargs='*', metavar='TITLE_ID')
+    p.add_argument('--all', action='store_true', help="every title found")
+    p.add_argument('--direction', required=True, choices=('ryu-to-ci', 'ci-to-ryu', 'newest'),
+                   help="newest: copy whichever side was modified last (titles on both sides only)")
+    p.add_argument('--dry-run', action='store_true')
+
+    p = sub.add_parser('backup', help="back up saves (all titles by default)")
+    p.add_argument('title_ids', nargs='*', metavar='TITLE_ID')
+    p.add_argument('--source', choices=('ryujinx', 'citron'))
+
+    p = sub.add_parser('restore', help="list or restore a title's backups")
+    p.add_argument('title_id', metavar='TITLE_ID')
+    p.add_argument('--source', choices=('ryujinx', 'citron'),
+                   help="only that emulator's backups; also the target for old backups that do not record one")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument('--list', action='store_true')
+    group.add_argument('--backup', metavar='NAME', help="backup file name, as shown by --list")
+    group.add_argument('--latest', action='store_true')
+    return parser
+
+
+COMMANDS = {'scan': cmd_scan, 'status': cmd_status, 'sync': cmd_sync, 'backup': cmd_backup, 'restore': cmd_restore}
+
+
+def citron_user_chooser(preset: Optional[str]):
+    """Replaces FolderMap's interactive input() prompt: pick --citron-user, or fail."""
+    def choose(options):
+        if preset in options:
+            return preset
+        raise CliError(f"Several Citron user folders found ({', '.join(options)}); pass one as --citron-user")
+    return choose
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    out = Output(sys.stdout, args.format)
+    # Never block on input() when run from cron/systemd
+    foldermap.prompt_for_choice_gui = citron_user_chooser(args.citron_user)
+    log = open(os.devnull, 'w') if args.quiet else sys.stderr
+    try:
+        # The engine and scanner report progress with print(); keep stdout machine-readable
+        with contextlib.redirect_stdout(log):
+            session = open_session(args)
+            try:
+                return COMMANDS[args.command](session, args, out)
+            finally:
+                if session.nswdb is not None:
+                    session.nswdb.close()
+    except CliError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        out.close()
+        if log is not sys.stderr:
+            log.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+fastcopy.py — cheapest-possible file copies for staging save trees.
+
+clone_file() tries, in order:
+  1. a copy-on-write reflink (FICLONE ioctl; btrfs, XFS, bcachefs, ...)
+  2. os.copy_file_range (in-kernel copy; server-side on NFS/SMB where supported)
+  3. shutil.copyfile
+and then copies metadata like shutil.copy2.
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int)
+
+if sys.platform.startswith('linux'):
+    import fcntl
+else:
+    fcntl = None
+
+
+def _reflink(fsrc, fdst) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy_file_range(fsrc, fdst) -> bool:
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    size = os.fstat(fsrc.fileno()).st_size
+    copied = 0
+    try:
+        while copied < size:
+            n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+            if n == 0:
+                break
+            copied += n
+    except OSError:
+        if copied:
+            raise
+        return False
+    return copied == size
+
+
+def clone_file(src: Path, dst: Path) -> str:
+    """Copy `src` to `dst` (with metadata) using the fastest available method.
+
+    Returns the method used: 'reflink', 'copy_file_range' or 'copy'.
+    """
+    method = 'copy'
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if _reflink(fsrc, fdst):
+            method = 'reflink'
+        elif _copy_file_range(fsrc, fdst):
+            method = 'copy_file_range'
+        else:
+            fdst.seek(0)
+            fdst.truncate()
+            fsrc.seek(0)
+            shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+    shutil.copystat(src, dst)
+    return method
+
+
+def link_or_clone(src: Path, dst: Path) -> str:
+    """Hardlink `src` at `dst`, falling back to clone_file(); returns 'link' or the clone method."""
+    try:
+        os.link(src, dst)
+        return 'link'
+    except OSError:
+        return clone_file(src, dst)
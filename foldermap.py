@@ -1,7 +1,8 @@
 import json
 import os
+import threading
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from typing import Callable
 
 prompt_for_choice_gui: Optional[Callable[[list[str]], Optional[str]]] = None
@@ -11,10 +12,22 @@ class FolderMap:
         self.path = path
         # Internal maps (new schema stores a 'ryujinx' dict)
         self.ryujinx: Dict[str, str] = {}
+        # Reverse index TitleID -> folder id (first folder in mapping order wins)
+        self._by_title: Dict[str, str] = {}
+        # Registrations are batched in memory; flush() writes them once per scan
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Serializes whole writes (snapshot, temp file, rename): scans flush from several threads
+        self._save_lock = threading.Lock()
         self.cached_citron_user: Optional[str] = None
         self.cached_citron_base: Optional[Path] = None
+        # Persisted Citron resolution (base, user, save root + validation stamps); only
+        # trusted after _citron_record_valid() confirms nothing relevant changed on disk
+        self._citron: Dict[str, object] = {}
+        # Ryujinx save root found by bounded discovery (only when no known layout matched)
+        self._ryujinx_root: Dict[str, object] = {}
         self.load()
-        
+
     def load(self):
         # Support both legacy flat maps and the new namespaced schema
         if self.path.exists():
@@ -25,6 +38,10 @@ class FolderMap:
                 # 1) New namespaced schema: { "ryujinx": { ... } }
                 if isinstance(raw, dict) and 'ryujinx' in raw and isinstance(raw['ryujinx'], dict):
                     self.ryujinx = {k: v.upper() for k, v in raw['ryujinx'].items()}
+                    if isinstance(raw.get('citron'), dict):
+                        self._citron = raw['citron']
+                    if isinstance(raw.get('ryujinx_root'), dict):
+                        self._ryujinx_root = raw['ryujinx_root']
 
                 # 2) Legacy flat schema: { "<folder_id>": "<title_id>", ... }
                 elif isinstance(raw, dict) and raw and all(isinstance(v, str) for v in raw.values()):
@@ -34,26 +51,84 @@ class FolderMap:
                     self.ryujinx = {}
             except Exception:
                 self.ryujinx = {}
+        self._reindex()
+        self._dirty = False
 
     def save(self):
-        # Persist only the ryujinx mapping under a namespaced key for clarity
-        to_write = {'ryujinx': self.ryujinx}
-        with open(self.path, 'w', encoding='utf-8') as f:
-            json.dump(to_write, f, indent=2)
+        # Persist the ryujinx mapping under a namespaced key, plus the remembered Citron
+        # resolution and Ryujinx save root. Write a temp file and rename it over the old
+        # one so a crash never leaves a torn map; one writer at a time, so concurrent
+        # flushes neither share the temp file nor land an older snapshot last.
+        with self._save_lock:
+            with self._lock:
+                to_write = {'ryujinx': dict(self.ryujinx)}
+                if self._citron:
+                    to_write['citron'] = dict(self._citron)
+                if self._ryujinx_root:
+                    to_write['ryujinx_root'] = dict(self._ryujinx_root)
+                self._dirty = False
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(to_write, f, indent=2)
+                os.replace(tmp, self.path)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def flush(self):
+        """Write the mapping if registrations changed it since the last save."""
+        if self._dirty:
+            self.save()
+
+    def clear(self):
+        """Forget every Ryujinx mapping and the resolved Citron user (call save()/flush() to persist)."""
+        with self._lock:
+            self.ryujinx = {}
+            self._by_title = {}
+            self._citron = {}
+            self._ryujinx_root = {}
+            self._dirty = True
+        self.cached_citron_user = None
+        self.cached_citron_base = None
+
+    def forget_citron_user(self):
+        """Drop the resolved Citron user so the next scan resolves (and, with several users, asks) again."""
+        with self._lock:
+            if self._citron:
+                self._citron = {}
+                self._dirty = True
+        self.cached_citron_user = None
+        self.cached_citron_base = None
+
+    def _reindex(self):
+        by_title = {}
+        for fid, tid in self.ryujinx.items():
+            by_title.setdefault(tid, fid)
+        self._by_title = by_title
 
     # --- Ryujinx-specific mapping API (explicit, unambiguous) ---
     def get_ryujinx_title_id(self, folder_id: str) -> Optional[str]:
         return self.ryujinx.get(folder_id)
 
     def get_ryujinx_folder_id(self, title_id: str) -> Optional[str]:
-        for fid, tid in self.ryujinx.items():
-            if tid.upper() == title_id.upper():
-                return fid
-        return None
+        return self._by_title.get(title_id.upper())
 
     def register_ryujinx_folder(self, folder_id: str, title_id: str):
-        self.ryujinx[folder_id] = title_id.upper()
-        self.save()
+        title_id = title_id.upper()
+        with self._lock:
+            if self.ryujinx.get(folder_id) == title_id:
+                return
+            previous = self.ryujinx.get(folder_id)
+            self.ryujinx[folder_id] = title_id
+            if previous is None:
+                # New folder: it comes last in mapping order, so it only wins for a new TitleID
+                self._by_title.setdefault(title_id, folder_id)
+            else:
+                # A folder changing TitleID (rare) can move the winner for both titles
+                self._reindex()
+            self._dirty = True
 
     # Backwards-compatible aliases that operate only on Ryujinx mappings
     def get_title_id(self, folder_id: str) -> Optional[str]:
@@ -65,10 +140,39 @@ class FolderMap:
     def register_folder(self, folder_id: str, title_id: str):
         return self.register_ryujinx_folder(folder_id, title_id)
 
+    def recorded_ryujinx_root(self, ryujinx_base: Path) -> Optional[Path]:
+        """The save root remembered for `ryujinx_base`, if the base folder hasn't changed since."""
+        rec = self._ryujinx_root
+        if not rec or rec.get('base') != str(ryujinx_base):
+            return None
+        root = Path(rec['root'])
+        try:
+            if ryujinx_base.stat().st_mtime_ns != rec.get('stamp') or not root.is_dir():
+                return None
+        except OSError:
+            return None
+        return root
+
+    def remember_ryujinx_root(self, ryujinx_base: Path, root: Path):
+        try:
+            stamp = ryujinx_base.stat().st_mtime_ns
+        except OSError:
+            return
+        with self._lock:
+            self._ryujinx_root = {'base': str(ryujinx_base), 'root': str(root), 'stamp': stamp}
+            self._dirty = True
+
     def resolve_citron_user(self, citron_base: Path, known_title_ids: set) -> Optional[str]:
         if self.cached_citron_user:
             return self.cached_citron_user
 
+        # A previous run's answer is reused while qt-config.ini and the save base folder
+        # (whose mtime changes when a user folder is added or removed) are untouched
+        if self._citron_record_valid(citron_base):
+            self.cached_citron_base = Path(self._citron['save_base'])
+            self.cached_citron_user = self._citron['user_id']
+            return self.cached_citron_user
+
         # Check for Citron's custom global save path in qt-config.ini
         config_file = citron_base / "user/config/qt-config.ini"
         base = None
@@ -150,11 +254,9 @@ class FolderMap:
 
         elif len(candidates) == 1:
             self.cached_citron_user = candidates[0]
-            return self.cached_citron_user  # ✅ early return after setting
 
         elif prompt_for_choice_gui:
             self.cached_citron_user = prompt_for_choice_gui(candidates)
-            return self.cached_citron_user  # ✅ early return after GUI choice
 
         else:
             print("Multiple Citron user folders detected. Please choose:")
@@ -163,7 +265,81 @@ class FolderMap:
             choice = input("Enter the number of the correct folder: ")
             try:
                 self.cached_citron_user = candidates[int(choice.strip())]
-                return self.cached_citron_user  # ✅ early return after manual input
             except (IndexError, ValueError):
                 print("Invalid selection.")
-                return None
\ No newline at end of file
+                return None
+
+        if self.cached_citron_user:
+            self._remember_citron(citron_base)
+        return self.cached_citron_user
+
+    def citron_save_root(self, citron_base: Path, user_id: str) -> Path:
+        """Folder holding <titleID> save folders for `user_id` (remembered alongside the user)."""
+        if (self._citron_record_valid(citron_base) and self._citron.get('user_id') == user_id
+                and self._citron.get('save_root')):
+            return Path(self._citron['save_root'])
+
+        # Determine actual save_root. Prefer any cached base discovered by resolve_citron_user
+        cached_base = self.cached_citron_base
+        save_root = None
+        if cached_base:
+            # If cached_base already points to the 0000 folder
+            if cached_base.name == "0000000000000000":
+                save_root = cached_base / user_id
+            else:
+                # Try some likely subpaths under the cached base
+                candidates = [
+                    cached_base / "user/nand/user/save/0000000000000000" / user_id,
+                    cached_base / "user/save/0000000000000000" / user_id,
+                    cached_base / "user/nand/user/save" / user_id,
+                    cached_base / "user/save" / user_id,
+                    cached_base / user_id,
+                ]
+                for cand in candidates:
+                    if cand.exists() and cand.is_dir():
+                        save_root = cand
+                        break
+
+        if not save_root:
+            # Fallback to configured citron base
+            save_root = citron_base / "user/nand/user/save/0000000000000000" / user_id
+
+        if self._citron.get('user_id') == user_id and self._citron_record_valid(citron_base):
+            with self._lock:
+                self._citron['save_root'] = str(save_root)
+                self._dirty = True
+            self.flush()
+        return save_root
+
+    def _citron_stamp(self, citron_base: Path, save_base: Path) -> List[Optional[int]]:
+        """[qt-config.ini mtime_ns, save base mtime_ns] — None for a missing path."""
+        stamp = []
+        for path in (citron_base / "user/config/qt-config.ini", save_base):
+            try:
+                stamp.append(path.stat().st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return stamp
+
+    def _citron_record_valid(self, citron_base: Path) -> bool:
+        rec = self._citron
+        if not rec or rec.get('citron_base') != str(citron_base) or not rec.get('user_id'):
+            return False
+        stamp = self._citron_stamp(citron_base, Path(rec['save_base']))
+        return stamp[1] is not None and stamp == rec.get('stamp')
+
+    def _remember_citron(self, citron_base: Path):
+        if self.cached_citron_base is None:
+            return
+        with self._lock:
+            self._citron = {
+                'citron_base': str(citron_base),
+                'save_base': str(self.cached_citron_base),
+                'user_id': self.cached_citron_user,
+                'stamp': self._citron_stamp(citron_base, self.cached_citron_base),
+            }
+            self._dirty = True
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Warning: could not save Citron resolution to {self.path}: {e}")
\ No newline at end of file
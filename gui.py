@@ -1,11 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from models import Config, SaveEntry
-from nswdb_parser import NSWDBParser
-from save_scanner import SaveScanner
-from syncengine import SyncEngine
-from foldermap import FolderMap
+from models import SyncJob, SyncResult
+from session import SyncSession
+from batch_sync import BatchBackupExecutor, BatchSyncExecutor
 from platform_defaults import detect_linux_defaults
+from save_manifest import classify
 
 from pathlib import Path
 from collections import defaultdict
@@ -13,10 +12,23 @@ from datetime import datetime
 import json
 import os
 import platform
+import queue
 import subprocess
+import threading
+import time
 
 CONFIG_FILE = Path(".gui_config.json")
 
+# Per-title action -> Combobox label / Action column glyph
+ACTION_LABELS = {'none': 'No action', 'ryu_to_ci': 'Copy Ryujinx → Citron', 'ci_to_ryu': 'Copy Citron → Ryujinx'}
+ACTION_DISPLAY = {'none': '', 'ryu_to_ci': '→', 'ci_to_ryu': '←'}
+# Status column text for save_manifest.classify() results
+STATUS_DISPLAY = {'only_ryujinx': '🟥 Only in Ryujinx', 'only_citron': '🟥 Only in Citron',
+                  'needs_ryujinx_init': '🚫 Run in Ryujinx'}
+NEWER_DISPLAY = {'ryujinx_newer': '🔺 Ryujinx newer', 'citron_newer': '🟢 Citron newer', 'unsynced': '🔁 Unsynced'}
+# How often the save watcher is polled for changed folders
+WATCH_INTERVAL_MS = 2000
+
 class SaveSyncApp:
     def __init__(self, root):
         self.root = root
@@ -28,8 +40,11 @@ class SaveSyncApp:
         self.sort_column = "Title"
         self.sort_reverse = False
         self.show_only_unsynced = tk.BooleanVar(value=False)
+        # Rescan changed save folders automatically (session.watcher)
+        self.auto_refresh = tk.BooleanVar(value=True)
 
-        # Internal state
+        # Internal state (components are owned by the long-lived session; these are aliases)
+        self.session = SyncSession()
         self.config = None
         self.nswdb = None
         self.folder_map = None
@@ -39,16 +54,32 @@ class SaveSyncApp:
         self.citron_user_id = None
         # Per-title user-selected action: 'none' | 'ryu_to_ci' | 'ci_to_ryu'
         self.user_actions = {}
-
-        # Set GUI prompt handler
+        # Background scan state: worker thread, cancel flag, and a generation counter so
+        # messages from a superseded refresh are ignored. Workers talk to Tk only via the queue.
+        self._scan_thread = None
+        self._scan_cancel = None
+        self._scan_generation = 0
+        self._scan_progress = {}
+        self._scan_seen = set()
+        self._scan_failed = False
+        self._ui_queue = queue.Queue()
+        self._polling = False
+        # Background Sync All / Backup All batch or restore (their queue messages carry no scan generation)
+        self._batch_thread = None
+        self._batch_cancel = None
+        # Incremental rescan of the folders the watcher reported
+        self._watch_thread = None
+
+        # Set GUI prompt handler (may be called from the scan worker)
         import foldermap
-        foldermap.prompt_for_choice_gui = self.prompt_for_folder_choice
+        foldermap.prompt_for_choice_gui = self._prompt_for_folder_choice_threadsafe
 
         # Build UI
         self.load_last_config()
         self.setup_ui()
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
         self.refresh_data()
+        self.root.after(WATCH_INTERVAL_MS, self._watch_tick)
 
     def load_last_config(self):
         if CONFIG_FILE.exists():
@@ -63,6 +94,7 @@ class SaveSyncApp:
                 self.sort_column = data.get("sort_column", self.sort_column)
                 self.sort_reverse = data.get("sort_reverse", self.sort_reverse)
                 self.show_only_unsynced.set(data.get("show_only_unsynced", False))
+                self.auto_refresh.set(data.get("auto_refresh", True))
             except:
                 pass
 
@@ -82,7 +114,8 @@ class SaveSyncApp:
             "geometry": self.root.geometry(),
             "sort_column": self.sort_column,
             "sort_reverse": self.sort_reverse,
-            "show_only_unsynced": self.show_only_unsynced.get()
+            "show_only_unsynced": self.show_only_unsynced.get(),
+            "auto_refresh": self.auto_refresh.get()
         }
         with open(CONFIG_FILE, 'w') as f:
             json.dump(data, f)
@@ -103,8 +136,9 @@ class SaveSyncApp:
         note.pack(pady=(0,5))
 
         # Filter
-        chk = ttk.Checkbutton(self.root, text="Show only unsynced entries", variable=self.show_only_unsynced, command=self.refresh_data)
+        chk = ttk.Checkbutton(self.root, text="Show only unsynced entries", variable=self.show_only_unsynced, command=self.render_rows)
         chk.pack()
+        ttk.Checkbutton(self.root, text="Auto-refresh when saves change", variable=self.auto_refresh).pack()
 
         # Treeview
         self.columns = ("Title","TitleID","Status","Ryujinx Date","Citron Date","Action")
@@ -113,18 +147,23 @@ class SaveSyncApp:
             self.tree.heading(col, text=col, command=lambda c=col: self.on_sort_by(c))
             self.tree.column(col, width=140 if col!='Title' else 250, anchor='w')
         self.tree.pack(fill='both', expand=True, padx=10, pady=5)
+        # Row model currently shown: TitleID (= item iid) -> (values, tags)
+        self._displayed_rows = {}
+
+        # Tag configuration
+        self.tree.tag_configure('match', background='#e0ffe0')
+        self.tree.tag_configure('ryujinx_newer', background='#fff4e0')
+        self.tree.tag_configure('citron_newer', background='#e0f7ff')
+        self.tree.tag_configure('only_ryujinx', background='#ffdede')
+        self.tree.tag_configure('only_citron', background='#dedefd')
+        self.tree.tag_configure('needs_init', background='#f0f0f0')
 
-        # Scrollbar
+        # Scrollbar — every scroll (wheel, keys, scrollbar drag) goes through yscrollcommand,
+        # which also schedules an action-widget relayout
         scroll = ttk.Scrollbar(self.root, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.configure(yscrollcommand=self._on_tree_yscroll)
         scroll.pack(side='right', fill='y')
-        # Listen for scrollbar activity so action widgets can be repositioned
         self.vscroll = scroll
-        try:
-            self.vscroll.bind('<ButtonRelease-1>', lambda e: self._reposition_action_widgets())
-            self.vscroll.bind('<B1-Motion>', lambda e: self._reposition_action_widgets())
-        except Exception:
-            pass
 
         # Bindings
         self.tree.bind('<Double-1>', self.sync_selected)
@@ -133,15 +172,16 @@ class SaveSyncApp:
         # Use ButtonRelease so Treeview's internal handlers don't steal focus from the combobox
         self.tree.bind('<ButtonRelease-1>', self.on_tree_click, add='+')
 
-        # Inline action picker values (we create a persistent Combobox per row)
-        self._action_choices = ["No action", "Copy Ryujinx → Citron", "Copy Citron → Ryujinx"]
-        # Map of TitleID -> Combobox widget (persistently shown for each visible row)
+        # Inline action picker: a small pool of Comboboxes sized to the visible rows and
+        # recycled on scroll (TitleID assignments live in _action_widgets)
+        self._action_choices = list(ACTION_LABELS.values())
+        self._action_pool = []
+        # Map of TitleID -> Combobox currently shown over that row's Action cell
         self._action_widgets = {}
-        # Reposition widgets on tree resize/scroll
-        self.tree.bind('<Configure>', lambda e: self._reposition_action_widgets())
-        self.tree.bind('<Expose>', lambda e: self._reposition_action_widgets())
-        self.tree.bind('<Motion>', lambda e: self._reposition_action_widgets())
-        self.tree.bind('<MouseWheel>', lambda e: self._reposition_action_widgets())
+        self._layout_pending = False
+        # Relayout on resize and after column drags; plain mouse motion never triggers it
+        self.tree.bind('<Configure>', lambda e: self._schedule_action_layout())
+        self.tree.bind('<ButtonRelease-1>', lambda e: self._schedule_action_layout(), add='+')
 
 
         # Buttons
@@ -150,8 +190,20 @@ class SaveSyncApp:
         ttk.Button(btn_frame, text="Backup All Saves", command=self.backup_all_saves).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Sync All", command=self.sync_all).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Refresh", command=self.refresh_data).pack(side='left')
+        ttk.Button(btn_frame, text="Full Rehash", command=lambda: self.refresh_data(force_rehash=True)).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="Change Citron User", command=self.change_citron_user).pack(side='left')
         ttk.Button(btn_frame, text="Exit", command=self.on_exit).pack(side='right')
 
+        # Scan progress
+        progress_frame = ttk.Frame(self.root)
+        progress_frame.pack(fill='x', padx=10, pady=(0, 5))
+        self.progress = ttk.Progressbar(progress_frame, mode='determinate')
+        self.progress.pack(side='left', fill='x', expand=True)
+        self.progress_label = ttk.Label(progress_frame, text="Ready", width=30)
+        self.progress_label.pack(side='left', padx=5)
+        self.cancel_button = ttk.Button(progress_frame, text="Cancel", command=self.cancel_work, state='disabled')
+        self.cancel_button.pack(side='left')
+
     def browse_ryujinx(self):
         path = filedialog.askdirectory()
         if path:
@@ -173,14 +225,32 @@ class SaveSyncApp:
     def redo_folder_mappings(self):
         # Recreate the FolderMap and clear any cached mappings so
         # subsequent scans will re-register folders for the new bases.
-        from pathlib import Path
-        mapping_path = (self.config.mapping_path if self.config else Path("folder_mapping.json"))
-        self.folder_map = FolderMap(mapping_path)
-        self.folder_map.ryujinx = {}
-        self.folder_map.cached_citron_user = None
-        self.folder_map.cached_citron_base = None
-        self.folder_map.save()
+        if self._syncing():
+            messagebox.showinfo("Busy", "Wait for the running sync, backup or restore to finish first.")
+            return
+        self.cancel_scan()
+        if self._scan_thread is not None:
+            self._scan_thread.join()
+        self.session.reset_folder_mappings()
+        self.folder_map = self.session.folder_map
+        self.citron_user_id = None
+        # Saves from the previous bases must not linger in the table
+        self.all_saves.clear()
+        self.render_rows()
+
+    def change_citron_user(self):
+        # The chosen Citron user is remembered across launches; forget it and scan again
+        if self._syncing():
+            messagebox.showinfo("Busy", "Wait for the running sync, backup or restore to finish first.")
+            return
+        self.cancel_scan()
+        if self._scan_thread is not None:
+            self._scan_thread.join()
+        if self.session.folder_map is not None:
+            self.session.folder_map.forget_citron_user()
+            self.session.folder_map.flush()
         self.citron_user_id = None
+        self.refresh_data()
 
     def on_sort_by(self, col):
         if self.sort_column == col:
@@ -188,7 +258,8 @@ class SaveSyncApp:
         else:
             self.sort_column = col
             self.sort_reverse = False
-        self.refresh_data()
+        # Sorting only reorders the in-memory rows — no rescan
+        self.render_rows()
 
     def format_time(self, t):
         if isinstance(t, datetime):
@@ -205,46 +276,6 @@ class SaveSyncApp:
             n /= 1024.0
         return f"{n:.1f}TB"
 
-    def _files_equal(self, a: 'Path', b: 'Path') -> bool:
-        try:
-            if a.stat().st_size != b.stat().st_size:
-                return False
-            # fast path: compare first/last bytes for very large files could be added, but use md5
-            import hashlib
-            ha = hashlib.md5()
-            hb = hashlib.md5()
-            with a.open('rb') as fa, b.open('rb') as fb:
-                while True:
-                    ca = fa.read(8192)
-                    cb = fb.read(8192)
-                    if not ca and not cb:
-                        break
-                    ha.update(ca)
-                    hb.update(cb)
-            return ha.digest() == hb.digest()
-        except Exception:
-            return False
-
-    def _slot_contains_citron_files(self, slot_path: 'Path', citron_path: 'Path') -> bool:
-        # Return True if every (non-ExtraData) file present in citron_path exists in slot_path
-        try:
-            for f in citron_path.rglob('*'):
-                if not f.is_file():
-                    continue
-                if f.name in ("ExtraData0", "ExtraData1"):
-                    continue
-                rel = f.relative_to(citron_path)
-                candidate = slot_path / rel
-                if not candidate.exists() or not candidate.is_file():
-                    return False
-                if candidate.stat().st_size != f.stat().st_size:
-                    return False
-                if not self._files_equal(f, candidate):
-                    return False
-            return True
-        except Exception:
-            return False
-
     # --- Inline Action dropdown handlers ---
     def on_tree_click(self, event):
         # If the Action column was clicked, focus (and open) the per-row combobox for that row
@@ -253,11 +284,7 @@ class SaveSyncApp:
         action_col = f"#{self.columns.index('Action') + 1}"
         if col != action_col or not row_id:
             return
-        vals = self.tree.item(row_id, 'values') or []
-        if len(vals) < 2:
-            return
-        tid = vals[1]
-        cb = self._action_widgets.get(tid)
+        cb = self._action_widgets.get(row_id)
         if not cb:
             return
         try:
@@ -266,123 +293,329 @@ class SaveSyncApp:
         except Exception:
             pass
 
+    def _on_tree_yscroll(self, first, last):
+        self.vscroll.set(first, last)
+        self._schedule_action_layout()
 
-    def _create_action_widget_for_row(self, iid: str, tid: str):
-        # Create a persistent Combobox widget for the given TitleID (if missing).
-        if tid in self._action_widgets:
-            return self._action_widgets[tid]
-        cb = ttk.Combobox(self.root, values=self._action_choices, state='readonly', width=28)
-        # Initialize selection from user_actions
-        sel = self.user_actions.get(tid, 'none')
-        if sel == 'none':
-            cb.set('No action')
-        elif sel == 'ryu_to_ci':
-            cb.set('Copy Ryujinx → Citron')
-        else:
-            cb.set('Copy Citron → Ryujinx')
-        # Bind selection to per-row handler
-        cb.bind('<<ComboboxSelected>>', lambda e, t=tid, i=iid: self._on_action_widget_selected(t, i))
-        self._action_widgets[tid] = cb
-        return cb
-
-    def _on_action_widget_selected(self, tid: str, iid: str):
-        cb = self._action_widgets.get(tid)
-        if not cb:
+    def _schedule_action_layout(self):
+        # Coalesce relayout requests: at most one pass per frame (~60 Hz)
+        if self._layout_pending:
+            return
+        self._layout_pending = True
+        self.root.after(16, self._reposition_action_widgets)
+
+    def _acquire_action_widget(self, index: int):
+        # Grow the pool on demand; widgets are never destroyed, only re-assigned
+        while len(self._action_pool) <= index:
+            cb = ttk.Combobox(self.root, values=self._action_choices, state='readonly', width=28)
+            cb.bind('<<ComboboxSelected>>', lambda e, w=cb: self._on_action_widget_selected(w))
+            self._action_pool.append(cb)
+        return self._action_pool[index]
+
+    def _on_action_widget_selected(self, cb):
+        tid = next((t for t, w in self._action_widgets.items() if w is cb), None)
+        if tid is None:
             return
         sel = cb.get()
-        if sel == 'No action':
-            action = 'none'
-            display = ''
-        elif sel == 'Copy Ryujinx → Citron':
-            action = 'ryu_to_ci'
-            display = '→'
-        else:
-            action = 'ci_to_ryu'
-            display = '←'
+        action = next((a for a, label in ACTION_LABELS.items() if label == sel), 'none')
         self.user_actions[tid] = action
-        try:
-            self.tree.set(iid, 'Action', display)
-        except Exception:
-            pass
+        self.render_rows()
         print(f"DEBUG: user_actions[{tid}] = {action}")
 
-    def _destroy_action_widgets(self):
-        for cb in list(self._action_widgets.values()):
-            try:
-                cb.destroy()
-            except Exception:
-                pass
-        self._action_widgets.clear()
+    def _visible_rows(self):
+        """Return the iids currently in the viewport (derived from yview, no per-row Tk calls)."""
+        children = self.tree.get_children()
+        if not children:
+            return ()
+        first, last = self.tree.yview()
+        n = len(children)
+        start = max(0, int(first * n))
+        end = min(n, int(last * n) + 1)
+        return children[start:end]
 
     def _reposition_action_widgets(self, _event=None):
-        """Place each per-row combobox over its Action cell (hide if row not visible)."""
+        """Place pooled comboboxes over the Action cells of the visible rows only."""
+        self._layout_pending = False
         action_col = f"#{self.columns.index('Action') + 1}"
-        for iid in self.tree.get_children():
-            vals = self.tree.item(iid, 'values') or []
-            if len(vals) < 2:
-                continue
-            tid = vals[1]
-            cb = self._action_widgets.get(tid) or self._create_action_widget_for_row(iid, tid)
+        try:
+            tree_x = self.tree.winfo_rootx() - self.root.winfo_rootx()
+            tree_y = self.tree.winfo_rooty() - self.root.winfo_rooty()
+        except Exception:
+            tree_x, tree_y = 0, 0
+
+        assigned = {}
+        used = 0
+        for iid in self._visible_rows():
             bbox = self.tree.bbox(iid, action_col)
             if not bbox:
-                try:
-                    cb.place_forget()
-                except Exception:
-                    pass
                 continue
+            tid = iid  # rows are keyed by TitleID
+            cb = self._acquire_action_widget(used)
+            used += 1
+            if self._action_widgets.get(tid) is not cb:
+                cb.set(ACTION_LABELS.get(self.user_actions.get(tid, 'none'), 'No action'))
+            assigned[tid] = cb
             x, y, w, h = bbox
             try:
-                tree_root_x = self.tree.winfo_rootx() - self.root.winfo_rootx()
-                tree_root_y = self.tree.winfo_rooty() - self.root.winfo_rooty()
-                place_x = tree_root_x + x
-                place_y = tree_root_y + y
+                cb.place(x=tree_x + x, y=tree_y + y, width=w, height=h)
+                cb.lift()
             except Exception:
-                place_x, place_y = x, y
+                pass
+        # Hide pooled widgets that are not needed for the current viewport
+        for cb in self._action_pool[used:]:
             try:
-                cb.place(x=place_x, y=place_y, width=w, height=h)
-                cb.lift()
+                cb.place_forget()
             except Exception:
                 pass
+        self._action_widgets = assigned
+
+    def refresh_data(self, force_rehash: bool = False):
+        """Start a background rescan; rows stream into the tree as titles finish.
 
-    def refresh_data(self):
+        A new refresh supersedes any scan still in flight.
+        """
         # Validate
         if not self.ryujinx_base.get() or not self.citron_base.get():
             return
-        # Destroy and later recreate persistent per-row action widgets while we refresh
-        self._destroy_action_widgets()
-        # Clear
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
-        # Init
-        self.config = Config(
-            ryujinx_base=Path(self.ryujinx_base.get()),
-            citron_base=Path(self.citron_base.get()),
-            backup_dir=Path("./backupHistory"),
-            nswdb_xml_path=Path("US.en.json"),
-            mapping_path=Path("folder_mapping.json")
+        if self._syncing():
+            return  # the batch refreshes once it finishes
+        self.cancel_scan()
+        self._scan_generation += 1
+        self._scan_cancel = threading.Event()
+        self._scan_progress = {}
+        # Keep showing the current rows; fresh entries replace them as they arrive and
+        # anything not seen again is dropped when the scan completes
+        self._scan_seen = set()
+        self._scan_failed = False
+        self.progress.configure(value=0, maximum=1)
+        self.progress_label.configure(text="Loading title database…")
+        self.cancel_button.configure(state='normal')
+
+        bases = (Path(self.ryujinx_base.get()), Path(self.citron_base.get()))
+        self._scan_thread = threading.Thread(
+            target=self._scan_worker,
+            args=(self._scan_generation, bases, force_rehash, self.citron_user_id is None,
+                  self._scan_cancel, self._scan_thread),
+            name='save-scan-worker',
+            daemon=True
         )
-        self.nswdb = NSWDBParser(self.config.nswdb_xml_path)
-        self.nswdb.load()
-        if not self.folder_map:
-            self.folder_map = FolderMap(self.config.mapping_path)
-        if self.citron_user_id is None:
-            self.citron_user_id = self.folder_map.resolve_citron_user(
-                self.config.citron_base,
-                set(self.nswdb.game_lookup.keys())
+        self._scan_thread.start()
+        self._start_polling()
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(100, self._poll_ui_queue)
+
+    def cancel_scan(self):
+        if self._scan_cancel is not None:
+            self._scan_cancel.set()
+
+    def cancel_work(self):
+        # Cancel button: stops a scan or the remaining titles of a Sync All batch
+        self.cancel_scan()
+        if self._batch_cancel is not None:
+            self._batch_cancel.set()
+
+    def _syncing(self) -> bool:
+        return self._batch_thread is not None and self._batch_thread.is_alive()
+
+    def _scanning(self) -> bool:
+        return self._scan_thread is not None and self._scan_thread.is_alive()
+
+    def _scan_worker(self, generation, bases, force_rehash, resolve_user, cancel, previous):
+        """Runs off the Tk thread: (re)load session components, then scan and stream results."""
+        def post(kind, payload=None):
+            self._ui_queue.put((generation, kind, payload))
+
+        try:
+            # Never run two scans on the shared session at once; the superseded one is cancelled
+            if previous is not None:
+                previous.join()
+            watch = self._watch_thread
+            if watch is not None:
+                watch.join()
+            if cancel.is_set():
+                return
+            self.session.ensure(*bases)
+            user_id = None
+            if resolve_user:
+                user_id = self.session.folder_map.resolve_citron_user(
+                    self.session.config.citron_base,
+                    self.session.nswdb.known_title_ids()
+                )
+            post('ready', user_id)
+            self.session.scan(
+                force_rehash=force_rehash,
+                on_entry=lambda e: post('entry', e),
+                on_progress=lambda source, done, total: post('progress', (source, done, total)),
+                cancel=cancel
             )
-        self.scanner = SaveScanner(self.config, self.nswdb)
-        self.scanner.folder_map = self.folder_map
-        self.engine = SyncEngine(self.config)
+            if not cancel.is_set():
+                # Track changes from this complete scan onwards for auto-refresh
+                self.session.start_watching()
+        except Exception as e:
+            post('error', e)
+        finally:
+            post('done', cancel.is_set())
+
+    def _watch_tick(self):
+        """Periodically rescan just the save folders that changed on disk (e.g. after playing)."""
+        self.root.after(WATCH_INTERVAL_MS, self._watch_tick)
+        if not self.auto_refresh.get() or self.session.watcher is None:
+            return
+        if self._scanning() or self._syncing() or (self._watch_thread is not None and self._watch_thread.is_alive()):
+            return
+        self._watch_thread = threading.Thread(target=self._watch_worker, args=(self._scan_generation,),
+                                              name='save-watch-worker', daemon=True)
+        self._watch_thread.start()
+        self._start_polling()
 
-        # Collect saves
-        ry = self.scanner.scan_ryujinx()
-        ci = self.scanner.scan_citron()
-        self.all_saves.clear()
-        for e in ry:
-            self.all_saves[e.title_id]['ryujinx'] = e
-        for e in ci:
-            self.all_saves[e.title_id]['citron'] = e
+    def _watch_worker(self, generation):
+        try:
+            result = self.session.rescan_changes()
+        except Exception as e:
+            print(f"⚠️ Incremental rescan failed: {e}")
+            return
+        if result is None or result[0] or result[1]:
+            self._ui_queue.put((generation, 'changes', result))
 
+    def _rescan_written(self, paths):
+        """Update the rows of the save folders a sync or restore wrote, without rescanning the library."""
+        if self._scanning() or self.session.scanner is None:
+            self.refresh_data()
+            return
+        # Runs as the watch thread: the watcher and scans wait for it, and it waits for a running watch rescan
+        previous = self._watch_thread
+        self._watch_thread = threading.Thread(target=self._rescan_worker,
+                                              args=(self._scan_generation, paths, previous),
+                                              name='save-rescan-worker', daemon=True)
+        self._watch_thread.start()
+        self._start_polling()
+
+    def _rescan_worker(self, generation, paths, previous):
+        if previous is not None:
+            previous.join()
+        try:
+            result = self.session.rescan_paths(paths)
+        except Exception as e:
+            print(f"⚠️ Rescan after sync failed: {e}")
+            result = None
+        # None falls back to a full refresh
+        self._ui_queue.put((generation, 'changes', result))
+
+    def _poll_ui_queue(self):
+        """Drain worker messages on the Tk thread (scheduled with root.after while work is pending)."""
+        rows_changed = False
+        try:
+            while True:
+                generation, kind, payload = self._ui_queue.get_nowait()
+                if kind == 'prompt':
+                    options, reply = payload
+                    # Always answer: the scan worker is blocked until it gets a reply
+                    choice = None
+                    try:
+                        choice = self.prompt_for_folder_choice(options)
+                    except Exception as e:
+                        print(f"⚠️ Citron user selection failed: {e}")
+                    finally:
+                        reply.put(choice)
+                    continue
+                if kind == 'batch_progress':
+                    result, done, total = payload
+                    self.progress.configure(value=done, maximum=max(total, 1))
+                    self.progress_label.configure(text=f"Syncing… {done}/{total}")
+                    continue
+                if kind == 'batch_done':
+                    self._finish_batch(*payload)
+                    continue
+                if kind == 'restore_done':
+                    self._finish_restore(*payload)
+                    continue
+                if kind == 'backup_progress':
+                    done, total = payload
+                    self.progress.configure(value=done, maximum=max(total, 1))
+                    self.progress_label.configure(text=f"Backing up… {done}/{total}")
+                    continue
+                if kind == 'backup_done':
+                    self._finish_backup_all(*payload)
+                    continue
+                if generation != self._scan_generation:
+                    continue  # superseded refresh
+                if kind == 'ready':
+                    self.config = self.session.config
+                    self.nswdb = self.session.nswdb
+                    self.folder_map = self.session.folder_map
+                    self.scanner = self.session.scanner
+                    self.engine = self.session.engine
+                    if payload is not None:
+                        self.citron_user_id = payload
+                    self.progress_label.configure(text="Scanning saves…")
+                elif kind == 'entry':
+                    self.all_saves[payload.title_id][payload.source] = payload
+                    self._scan_seen.add((payload.title_id, payload.source))
+                    rows_changed = True
+                elif kind == 'progress':
+                    source, done, total = payload
+                    self._scan_progress[source] = (done, total)
+                    done_all = sum(d for d, _ in self._scan_progress.values())
+                    total_all = sum(t for _, t in self._scan_progress.values())
+                    self.progress.configure(value=done_all, maximum=max(total_all, 1))
+                    self.progress_label.configure(text=f"Scanning saves… {done_all}/{total_all}")
+                elif kind == 'changes':
+                    if payload is None:
+                        # The watcher lost track of changes; fall back to a full rescan
+                        self.refresh_data()
+                        continue
+                    entries, removed = payload
+                    for tid, source in removed:
+                        sources = self.all_saves.get(tid)
+                        if sources is not None:
+                            sources.pop(source, None)
+                            if not sources:
+                                del self.all_saves[tid]
+                    for entry in entries:
+                        self.all_saves[entry.title_id][entry.source] = entry
+                    rows_changed = True
+                elif kind == 'error':
+                    self._scan_failed = True
+                    messagebox.showwarning("Scan failed", f"Could not scan saves:\n{payload}")
+                elif kind == 'done':
+                    if not payload and not self._scan_failed:
+                        self._drop_unseen_saves()
+                    self.cancel_button.configure(state='disabled')
+                    self.progress_label.configure(text="Scan cancelled" if payload else f"{len(self.all_saves)} title(s)")
+                    rows_changed = True
+        except queue.Empty:
+            pass
+
+        if rows_changed:
+            self.render_rows()
+        watching = self._watch_thread is not None and self._watch_thread.is_alive()
+        if self._scanning() or self._syncing() or watching or not self._ui_queue.empty():
+            self.root.after(100, self._poll_ui_queue)
+        else:
+            self._polling = False
+
+    def _drop_unseen_saves(self):
+        # After a complete scan, forget saves that were not found again (deleted on disk)
+        for tid in list(self.all_saves):
+            sources = self.all_saves[tid]
+            for key in [k for k in sources if (tid, k) not in self._scan_seen]:
+                del sources[key]
+            if not sources:
+                del self.all_saves[tid]
+
+    def _prompt_for_folder_choice_threadsafe(self, options):
+        # FolderMap may ask from the scan worker; Tk dialogs must run on the main thread
+        if threading.current_thread() is threading.main_thread():
+            return self.prompt_for_folder_choice(options)
+        reply = queue.Queue(maxsize=1)
+        self._ui_queue.put((None, 'prompt', (options, reply)))
+        return reply.get()
+
+    def render_rows(self):
+        """Bring the Treeview in line with the in-memory scan results (sort/filter only, no disk I/O)."""
         # Build rows
         rows = []
         for tid, sources in self.all_saves.items():
@@ -395,70 +628,37 @@ class SaveSyncApp:
             # Determine status (preserve the existing "newer" indicators but augment
             # them with file-count and largest-file information). Treat a MATCH if
             # any Ryujinx slot contains the Citron files.
-            st = ''
-            if r and c:
-                # Exact match against the canonical (primary) Ryujinx slot
-                if r.hash == c.hash:
-                    st = '✅ MATCH'
-                else:
-                    # Also consider individual Ryujinx slots — if any slot's hash equals Citron, count as MATCH
-                    matched_slot = None
-                    for sname, sinfo in getattr(r, 'slots', {}).items():
-                        if sinfo.get('hash') == c.hash:
-                            matched_slot = sname
-                            break
-
-                    # If no exact slot-hash match, check whether *any* slot contains all files from Citron
-                    subset_slot = None
-                    if not matched_slot:
-                        try:
-                            for sname, sinfo in getattr(r, 'slots', {}).items():
-                                slot_path = sinfo.get('path')
-                                if slot_path and self._slot_contains_citron_files(slot_path, c.path):
-                                    subset_slot = sname
-                                    break
-                        except Exception:
-                            subset_slot = None
-
-                    if matched_slot or subset_slot:
-                        slot_used = matched_slot or subset_slot
-                        st = f"✅ MATCH (Ryujinx slot {slot_used})"
-                    else:
-                        # base newer indicator (informational only)
-                        if r.modified_time > c.modified_time:
-                            base = '🔺 Ryujinx newer'
-                        elif c.modified_time > r.modified_time:
-                            base = '🟢 Citron newer'
-                        else:
-                            base = '🔁 Unsynced'
-
-                        # file-count comparison (Ryujinx uses aggregated slot counts)
-                        fc_note = None
-                        if getattr(r, 'file_count', 0) != getattr(c, 'file_count', 0):
-                            fc_winner = 'Ryujinx' if r.file_count > c.file_count else 'Citron'
-                            fc_note = f"more files: {fc_winner} ({max(r.file_count, c.file_count)} vs {min(r.file_count, c.file_count)})"
-
-                        # largest-file comparison
-                        lf_note = None
-                        if getattr(r, 'max_file_size', 0) != getattr(c, 'max_file_size', 0):
-                            lf_winner = 'Ryujinx' if r.max_file_size > c.max_file_size else 'Citron'
-                            lf_note = f"largest file: {lf_winner} ({self.format_bytes(max(r.max_file_size, c.max_file_size))} vs {self.format_bytes(min(r.max_file_size, c.max_file_size))})"
-
-                        notes = ' • '.join(n for n in (fc_note, lf_note) if n)
-                        st = f"{base}{(' • ' + notes) if notes else ''}"
-            elif r:
-                st = '🟥 Only in Ryujinx'
+            status = classify(r, c, self.folder_map.get_ryujinx_folder_id(tid) is not None)
+            kind = status['status']
+            if kind == 'match':
+                slot_used = status.get('ryujinx_slot')
+                st = f"✅ MATCH (Ryujinx slot {slot_used})" if slot_used else '✅ MATCH'
+            elif kind in STATUS_DISPLAY:
+                st = STATUS_DISPLAY[kind]
             else:
-                st = '🟥 Only in Citron' if self.folder_map.get_ryujinx_folder_id(tid) else '🚫 Run in Ryujinx'
+                # base newer indicator (informational only)
+                base = NEWER_DISPLAY[kind]
+
+                # file-count comparison (Ryujinx uses aggregated slot counts)
+                fc_note = None
+                if getattr(r, 'file_count', 0) != getattr(c, 'file_count', 0):
+                    fc_winner = 'Ryujinx' if r.file_count > c.file_count else 'Citron'
+                    fc_note = f"more files: {fc_winner} ({max(r.file_count, c.file_count)} vs {min(r.file_count, c.file_count)})"
+
+                # largest-file comparison
+                lf_note = None
+                if getattr(r, 'max_file_size', 0) != getattr(c, 'max_file_size', 0):
+                    lf_winner = 'Ryujinx' if r.max_file_size > c.max_file_size else 'Citron'
+                    lf_note = f"largest file: {lf_winner} ({self.format_bytes(max(r.max_file_size, c.max_file_size))} vs {self.format_bytes(min(r.max_file_size, c.max_file_size))})"
+
+                # number of files whose content differs from the primary slot
+                diff_note = f"{status['files_differ']} file(s) differ" if status.get('files_differ') else None
+
+                notes = ' • '.join(n for n in (fc_note, lf_note, diff_note) if n)
+                st = f"{base}{(' • ' + notes) if notes else ''}"
 
             # Action: use user-selected action (default 'none' -> display empty)
-            action = self.user_actions.get(tid, 'none')
-            if action == 'ryu_to_ci':
-                ac = '→'
-            elif action == 'ci_to_ryu':
-                ac = '←'
-            else:
-                ac = ''
+            ac = ACTION_DISPLAY.get(self.user_actions.get(tid, 'none'), '')
 
             rows.append((name, tid, st, rd, cd, ac))
 
@@ -468,15 +668,8 @@ class SaveSyncApp:
         if self.show_only_unsynced.get():
             rows = [r for r in rows if r[2] != '✅ MATCH']
 
-        # Tag configuration
-        self.tree.tag_configure('match', background='#e0ffe0')
-        self.tree.tag_configure('ryujinx_newer', background='#fff4e0')
-        self.tree.tag_configure('citron_newer', background='#e0f7ff')
-        self.tree.tag_configure('only_ryujinx', background='#ffdede')
-        self.tree.tag_configure('only_citron', background='#dedefd')
-        self.tree.tag_configure('needs_init', background='#f0f0f0')
-        
-        # Insert rows
+        # Tags for every row
+        new_rows = {}
         for row in rows:
             tags = []
             st = row[2]
@@ -494,10 +687,27 @@ class SaveSyncApp:
                 tags.append('needs_init')
             if row[5]:
                 tags.append('syncable')
-            iid = self.tree.insert('', 'end', values=row, tags=tags)
-
-        # Create / position persistent action comboboxes for visible rows
-        self._reposition_action_widgets()
+            new_rows[row[1]] = (tuple(row), tuple(tags))
+
+        # Diff against the displayed rows (keyed by TitleID, which is also the item iid):
+        # only removed, changed and new rows cost Tk calls. Items keep their iid, so the
+        # selection and scroll position survive.
+        for tid in [t for t in self._displayed_rows if t not in new_rows]:
+            self.tree.delete(tid)
+            del self._displayed_rows[tid]
+        for tid, (values, tags) in new_rows.items():
+            shown = self._displayed_rows.get(tid)
+            if shown is None:
+                self.tree.insert('', 'end', iid=tid, values=values, tags=tags)
+            elif shown != (values, tags):
+                self.tree.item(tid, values=values, tags=tags)
+            self._displayed_rows[tid] = (values, tags)
+        order = list(new_rows)
+        if list(self.tree.get_children()) != order:
+            self.tree.set_children('', *order)
+
+        # Re-assign pooled action comboboxes to the visible rows
+        self._schedule_action_layout()
 
     def sync_selected(self, event):
         # Debug: confirm method entry
@@ -506,6 +716,9 @@ class SaveSyncApp:
         print(f"DEBUG: identified row: {row_id}")
         if not row_id:
             return
+        if self._syncing():
+            messagebox.showinfo("Busy", "Wait for the running sync, backup or restore to finish first.")
+            return
         self.tree.selection_set(row_id)
         vals = self.tree.item(row_id, 'values')
         print(f"DEBUG: row values: {vals}")
@@ -516,118 +729,208 @@ class SaveSyncApp:
         print(f"DEBUG: action: {action}, r: {bool(r)}, c: {bool(c)}")
         # Use the user-selected action (default is 'none' — do nothing)
         selected_action = self.user_actions.get(title_id, 'none')
+        result = None
         if selected_action == 'ryu_to_ci':
             if not r:
                 messagebox.showwarning("Cannot sync", "No Ryujinx save present to copy from.")
             else:
-                print(f"DEBUG: syncing from Ryujinx to Citron for {title_id}")
-                citron_base_used = getattr(self.folder_map, 'cached_citron_base', None)
-                if citron_base_used is None:
-                    citron_base_used = self.config.citron_base / 'user/nand/user/save/0000000000000000'
-                dest = citron_base_used / self.citron_user_id / title_id
-                self.engine.sync(r, SaveEntry(title_id, r.game_name, 'citron', self.citron_user_id, dest, r.modified_time, ''))
+                dest, reason = self.session.sync_destination(r, c)
+                if dest is None:
+                    messagebox.showwarning("Cannot sync", reason)
+                else:
+                    print(f"DEBUG: syncing from Ryujinx to Citron for {title_id}")
+                    result = self._sync_one(r, dest)
         elif selected_action == 'ci_to_ryu':
             if not c:
                 messagebox.showwarning("Cannot sync", "No Citron save present to copy from.")
             else:
-                fid = self.folder_map.get_ryujinx_folder_id(title_id)
-                if not fid:
-                    messagebox.showwarning("Cannot sync", "No Ryujinx folder mapping exists for this TitleID.")
+                dest, reason = self.session.sync_destination(c, r)
+                if dest is None:
+                    messagebox.showwarning("Cannot sync", reason)
                 else:
                     print(f"DEBUG: syncing from Citron to Ryujinx for {title_id}")
-                    existing_ryu = self.all_saves.get(title_id, {}).get('ryujinx')
-                    if existing_ryu:
-                        dest = existing_ryu.path
-                    else:
-                        dest = self.config.ryujinx_base / 'portable/bis/user/save' / fid / '0'
-                    self.engine.sync(c, SaveEntry(title_id, c.game_name, 'ryujinx', fid, dest, c.modified_time, ''))
+                    result = self._sync_one(c, dest)
         else:
             messagebox.showinfo("No action selected", "Choose an action from the Action column before syncing.")
 
-        # Refresh once after performing the selected sync
-        self.refresh_data()
+        if result is None:
+            return
+        if result.status == 'skipped':
+            # Nothing was written, so the displayed rows are still accurate
+            messagebox.showinfo("Already in sync", f"{vals[0]}: both saves already hold the same data.")
+            return
+        # Rescan just the folders the sync wrote
+        self._rescan_written(result.destinations)
+
+    def _sync_one(self, source, dest):
+        # A failed write may have left some slots updated; the caller still refreshes
+        try:
+            return self.engine.sync(source, dest)
+        except Exception as e:
+            print(f"  ❌ Sync failed for {source.game_name} ({source.title_id}): {e}")
+            messagebox.showwarning("Sync failed", f"Could not sync {source.game_name}:\n{e}")
+            return SyncResult(source.title_id, 'failed', [dest.path], error=str(e))
 
     def sync_all(self):
+        if self._scanning():
+            messagebox.showinfo("Scan in progress", "Wait for the current scan to finish before syncing.")
+            return
+        if self._syncing():
+            return
         # Only perform syncs for titles where the user has explicitly selected an action.
-        performed = 0
+        jobs = []
         for tid, sources in self.all_saves.items():
             action = self.user_actions.get(tid, 'none')
             r = sources.get('ryujinx')
             c = sources.get('citron')
-            if action == 'ryu_to_ci':
-                if not r:
-                    continue
-                citron_base_used = getattr(self.folder_map, 'cached_citron_base', None)
-                if citron_base_used is None:
-                    citron_base_used = self.config.citron_base / 'user/nand/user/save/0000000000000000'
-                dest = citron_base_used / self.citron_user_id / tid
-                self.engine.sync(r, SaveEntry(tid, r.game_name, 'citron', self.citron_user_id, dest, r.modified_time, ''))
-                performed += 1
-            elif action == 'ci_to_ryu':
-                if not c:
-                    continue
-                fid = self.folder_map.get_ryujinx_folder_id(tid)
-                if not fid:
-                    continue
-                existing_ryu = self.all_saves.get(tid, {}).get('ryujinx')
-                if existing_ryu:
-                    dest = existing_ryu.path
-                else:
-                    # Detect preferred slot under the Ryujinx folder (prefer non-empty slots)
-                    ryu_folder = self.config.ryujinx_base / 'portable/bis/user/save' / fid
-                    chosen_slot = None
-                    try:
-                        candidates = [p for p in ryu_folder.iterdir() if p.is_dir() and p.name.isdigit()]
-                        non_empty = [s for s in candidates if any(f.is_file() for f in s.rglob('*'))]
-                        if non_empty:
-                            chosen_slot = max(non_empty, key=lambda s: max((f.stat().st_mtime for f in s.rglob('*') if f.is_file()), default=0.0))
-                        elif candidates:
-                            candidates.sort(key=lambda p: int(p.name) if p.name.isdigit() else 0)
-                            chosen_slot = candidates[0]
-                    except Exception:
-                        chosen_slot = None
-                    if chosen_slot:
-                        dest = chosen_slot
-                    else:
-                        dest = ryu_folder / '0'
-                self.engine.sync(c, SaveEntry(tid, c.game_name, 'ryujinx', fid, dest, c.modified_time, ''))
-                performed += 1
-        if performed == 0:
+            if action == 'ryu_to_ci' and r:
+                source, existing = r, c
+            elif action == 'ci_to_ryu' and c:
+                source, existing = c, r
+            else:
+                continue
+            dest, reason = self.session.sync_destination(source, existing)
+            if dest is None:
+                print(f"  ⚠️ Skipping {source.game_name} ({tid}): {reason}")
+                continue
+            jobs.append(SyncJob(source, dest))
+        if not jobs:
             messagebox.showinfo("No actions", "No sync actions selected. Use the Action dropdown to choose which save to keep.")
-        self.refresh_data()
+            return
+
+        # Run the batch off the Tk thread; progress and the summary come back through the UI queue
+        self._batch_cancel = threading.Event()
+        self.progress.configure(value=0, maximum=len(jobs))
+        self.progress_label.configure(text=f"Syncing… 0/{len(jobs)}")
+        self.cancel_button.configure(state='normal')
+        self._batch_thread = threading.Thread(
+            target=self._batch_worker,
+            args=(BatchSyncExecutor(self.engine), jobs, self._batch_cancel),
+            name='batch-sync-worker',
+            daemon=True
+        )
+        self._batch_thread.start()
+        self._start_polling()
+
+    def _batch_worker(self, executor, jobs, cancel):
+        """Runs off the Tk thread: sync every job, then post the results for the summary."""
+        def post(kind, payload):
+            self._ui_queue.put((None, kind, payload))
+
+        start = time.perf_counter()
+        results, error = [], None
+        try:
+            results = executor.run(
+                jobs,
+                on_result=lambda result, done, total: post('batch_progress', (result, done, total)),
+                cancel=cancel
+            )
+        except Exception as e:
+            error = e
+        post('batch_done', (jobs, results, time.perf_counter() - start, error))
+
+    def _finish_batch(self, jobs, results, elapsed, error):
+        # The worker's last act was posting this message
+        self._batch_thread.join()
+        self._batch_thread = None
+        self.cancel_button.configure(state='disabled')
+        counts = defaultdict(int)
+        for result in results:
+            counts[result.status] += 1
+        self.progress_label.configure(text=f"Synced {counts['synced']}/{len(jobs)} in {elapsed:.1f}s")
+
+        msg = f"Synced {counts['synced']} title(s) in {elapsed:.1f}s."
+        if counts['skipped']:
+            msg += f"\n{counts['skipped']} already matched and were skipped."
+        if counts['cancelled']:
+            msg += f"\n{counts['cancelled']} cancelled before starting."
+        # Slowest titles first
+        timed = sorted((pair for pair in zip(jobs, results) if pair[1].status in ('synced', 'failed')),
+                       key=lambda pair: pair[1].duration, reverse=True)
+        if timed:
+            msg += "\n\n" + "\n".join(
+                f"{job.destination.game_name}: {result.status} in {result.duration:.2f}s"
+                for job, result in timed[:10])
+            if len(timed) > 10:
+                msg += f"\n… and {len(timed) - 10} more"
+        failures = [(job, result) for job, result in zip(jobs, results) if result.status == 'failed']
+        if error is not None or failures:
+            if failures:
+                msg += f"\n\n{len(failures)} error(s):\n" + "\n".join(
+                    f"{job.destination.title_id}: {result.error}" for job, result in failures[:10])
+            if error is not None:
+                msg += f"\n\nBatch aborted: {error}"
+            messagebox.showwarning("Sync All", msg)
+        else:
+            messagebox.showinfo("Sync All", msg)
+
+        written = [d for result in results if result.status == 'synced' for d in result.destinations]
+        written += [job.destination.path for job, _ in failures]
+        if written:
+            self._rescan_written(written)
 
     def backup_all_saves(self):
+        if self._scanning():
+            messagebox.showinfo("Scan in progress", "Wait for the current scan to finish before backing up.")
+            return
+        if self._syncing():
+            messagebox.showinfo("Busy", "Wait for the running sync, backup or restore to finish first.")
+            return
         if not self.engine or not self.all_saves:
-            self.refresh_data()
-        if not self.engine:
             messagebox.showwarning("Not ready", "Could not load save data. Check your emulator paths and try again.")
             return
 
-        backed_up = 0
-        skipped = 0
-        errors = []
+        entries = [entry for sources in self.all_saves.values()
+                   for entry in (sources.get('ryujinx'), sources.get('citron')) if entry is not None]
+
+        # Archive on a worker pool off the Tk thread; progress and the summary come back through the UI queue
+        self._batch_cancel = threading.Event()
+        self.progress.configure(value=0, maximum=max(len(entries), 1))
+        self.progress_label.configure(text=f"Backing up… 0/{len(entries)}")
+        self.cancel_button.configure(state='normal')
+        self._batch_thread = threading.Thread(
+            target=self._backup_worker,
+            args=(BatchBackupExecutor(self.engine), entries, self._batch_cancel),
+            name='batch-backup-worker',
+            daemon=True
+        )
+        self._batch_thread.start()
+        self._start_polling()
 
-        for tid, sources in self.all_saves.items():
-            for key in ('ryujinx', 'citron'):
-                entry = sources.get(key)
-                if entry is None:
-                    continue
-                try:
-                    if not entry.path.exists():
-                        skipped += 1
-                        continue
-                    files = [f for f in entry.path.rglob('*') if f.is_file()]
-                    if not files:
-                        skipped += 1
-                        continue
-                    self.engine._backup(entry)
-                    backed_up += 1
-                except Exception as e:
-                    errors.append(f"{tid} ({key}): {e}")
+    def _backup_worker(self, executor, entries, cancel):
+        """Runs off the Tk thread: back up every save, then post the results for the summary."""
+        def post(kind, payload):
+            self._ui_queue.put((None, kind, payload))
 
-        msg = f"Backed up {backed_up} save(s)."
-        if skipped:
-            msg += f"\n{skipped} skipped (no files found)."
+        start = time.perf_counter()
+        results, error = [], None
+        try:
+            results = executor.run(
+                entries,
+                on_result=lambda result, done, total: post('backup_progress', (done, total)),
+                cancel=cancel
+            )
+        except Exception as e:
+            error = e
+        post('backup_done', (results, time.perf_counter() - start, error))
+
+    def _finish_backup_all(self, results, elapsed, error):
+        self._batch_thread.join()
+        self._batch_thread = None
+        self.cancel_button.configure(state='disabled')
+        counts = defaultdict(int)
+        for result in results:
+            counts[result.status] += 1
+        self.progress_label.configure(text=f"Backed up {counts['backed_up']} save(s) in {elapsed:.1f}s")
+
+        msg = f"Backed up {counts['backed_up']} save(s) in {elapsed:.1f}s."
+        if counts['skipped']:
+            msg += f"\n{counts['skipped']} skipped (no files found, or already backed up)."
+        if counts['cancelled']:
+            msg += f"\n{counts['cancelled']} cancelled before starting."
+        errors = [f"{r.entry.title_id} ({r.entry.source}): {r.error}" for r in results if r.status == 'failed']
+        if error is not None:
+            errors.append(f"Backup aborted: {error}")
         if errors:
             msg += f"\n\n{len(errors)} error(s):\n" + "\n".join(errors[:10])
             messagebox.showwarning("Backup All Saves", msg)
@@ -645,15 +948,12 @@ class SaveSyncApp:
         dlg.grab_set()
         ttk.Label(dlg, text="Multiple save folders found. Select one:").pack(pady=10)
 
-        # Determine base path for the listed folders (FolderMap caches it earlier)
-        base = None
-        try:
-            base = getattr(self.folder_map, 'cached_citron_base', None)
-        except Exception:
-            base = None
-        if base is None:
+        # Determine base path for the listed folders (FolderMap caches it earlier).
+        # Read the session: on the first refresh the prompt arrives before self.config is set.
+        base = getattr(self.session.folder_map, 'cached_citron_base', None)
+        if base is None and self.session.config is not None:
             # Fallback to the expected Citron save base
-            base = self.config.citron_base / "user/nand/user/save/0000000000000000"
+            base = self.session.config.citron_base / "user/nand/user/save/0000000000000000"
 
         var = tk.StringVar(value=options[0])
         for opt in options:
@@ -663,6 +963,8 @@ class SaveSyncApp:
             rb.pack(side='left', anchor='w', expand=True, fill='x')
 
             def _open(o=opt, b=base):
+                if b is None:
+                    return
                 try:
                     p = Path(b) / o
                     if not p.exists():
@@ -695,8 +997,99 @@ class SaveSyncApp:
         if c:
             menu.add_command(label="Open Citron Save Folder", command=lambda: self.open_path(c.path))
         menu.add_command(label="Open Backup Folder", command=lambda: self.open_path(self.config.backup_dir))
+        menu.add_separator()
+        menu.add_command(label="Restore from Backup…", command=lambda: self.restore_from_backup(tid))
         menu.post(event.x_root, event.y_root)
 
+    def restore_from_backup(self, tid):
+        if self._scanning() or self._syncing():
+            messagebox.showinfo("Busy", "Wait for the current scan or sync to finish first.")
+            return
+        sources = self.all_saves.get(tid, {})
+        entry = sources.get('ryujinx') or sources.get('citron')
+        if entry is None or not self.engine:
+            return
+        backups = self.engine.list_backups(tid, entry.game_name)
+        if not backups:
+            messagebox.showinfo("No backups", f"No backups found for {entry.game_name}.")
+            return
+
+        dlg = tk.Toplevel(self.root)
+        dlg.title(f"Restore {entry.game_name}")
+        dlg.transient(self.root)
+        dlg.grab_set()
+        ttk.Label(dlg, text="Select a backup to restore (newest first):").pack(pady=10)
+        listbox = tk.Listbox(dlg, width=70, height=min(len(backups), 12))
+        for b in backups:
+            listbox.insert('end', f"{self.format_time(b['created'])}   {b.get('source') or '?':<8} "
+                                  f"{b['file_count']} file(s), {self.format_bytes(b['size'])}")
+        listbox.selection_set(0)
+        listbox.pack(fill='both', expand=True, padx=20)
+        chosen = {}
+
+        def _ok():
+            sel = listbox.curselection()
+            if sel:
+                chosen['backup'] = backups[sel[0]]
+            dlg.destroy()
+
+        btns = ttk.Frame(dlg)
+        btns.pack(pady=10)
+        ttk.Button(btns, text="Restore", command=_ok).pack(side='left', padx=5)
+        ttk.Button(btns, text="Cancel", command=dlg.destroy).pack(side='left', padx=5)
+        self.root.wait_window(dlg)
+
+        backup = chosen.get('backup')
+        if backup is None:
+            return
+        source = backup.get('source')
+        if source is None:
+            # Backups made before the index recorded their emulator: ask unless only one save is present
+            if len(sources) == 1:
+                source = next(iter(sources))
+            else:
+                answer = messagebox.askyesnocancel(
+                    "Restore backup",
+                    "This backup does not record which emulator it was taken from.\n\n"
+                    "Restore it into the Ryujinx save? Choose No to restore into the Citron save.")
+                if answer is None:
+                    return
+                source = 'ryujinx' if answer else 'citron'
+        target = sources.get(source)
+        if target is None:
+            messagebox.showwarning("Cannot restore",
+                                   f"The {source.capitalize()} save of {entry.game_name} is not present any more.")
+            return
+        if not messagebox.askyesno("Restore backup",
+                                   f"Replace the current {target.source} save of {target.game_name} "
+                                   f"with the backup from {self.format_time(backup['created'])}?\n\n"
+                                   "The current save is backed up first."):
+            return
+
+        # Large archives take a while; restore off the Tk thread like Sync All
+        def worker():
+            result, error = None, None
+            try:
+                result = self.engine.restore(target, backup['name'])
+            except Exception as e:
+                error = e
+            self._ui_queue.put((None, 'restore_done', (target, result, error)))
+
+        self.progress_label.configure(text=f"Restoring {target.game_name}…")
+        self._batch_thread = threading.Thread(target=worker, name='restore-worker', daemon=True)
+        self._batch_thread.start()
+        self._start_polling()
+
+    def _finish_restore(self, target, result, error):
+        self._batch_thread.join()
+        self._batch_thread = None
+        if error is not None:
+            self.progress_label.configure(text="Restore failed")
+            messagebox.showwarning("Restore failed", f"Could not restore {target.game_name}:\n{error}")
+            return
+        self.progress_label.configure(text=f"Restored {target.game_name}")
+        self._rescan_written(result.destinations or [target.path])
+
     def open_path(self, path):
         p = str(path)
         if platform.system() == "Windows":
@@ -707,6 +1100,8 @@ class SaveSyncApp:
             subprocess.call(["xdg-open", p])
 
     def on_exit(self):
+        self.cancel_work()
+        self.session.stop_watching()
         self.save_last_config()
         self.root.quit()
 
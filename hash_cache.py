@@ -0,0 +1,97 @@
+"""
+hash_cache.py — persistent per-file digest cache used by SaveScanner.
+
+Each hashed save directory keeps a record per file:
+    relative path -> [size, mtime_ns, inode, tagged digest]
+
+A file is only re-read when its (size, mtime_ns, inode) signature differs from the
+recorded one, so unchanged saves are "hashed" with a single stat per file.
+Digests carry their algorithm tag (see content_hash.py) and are only reused for the
+algorithm that made them.
+The cache is stored as JSON and written atomically (temp file + rename).
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import content_hash
+
+# Files modified this recently are not cached: a write landing in the same mtime tick
+# as our read would otherwise leave a stale digest behind an unchanged signature.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class HashCache:
+    VERSION = 2
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._dirs: Dict[str, Dict[str, List]] = {}
+        self._dirty = False
+        # Scanner worker threads share one cache
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        self._dirs = {}
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if isinstance(raw, dict) and raw.get('version') == self.VERSION and isinstance(raw.get('dirs'), dict):
+                self._dirs = raw['dirs']
+        except Exception:
+            # A corrupt cache only costs a full rehash
+            self._dirs = {}
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            # Drop records for save folders that no longer exist
+            for key in [k for k in self._dirs if not os.path.isdir(k)]:
+                del self._dirs[key]
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.VERSION, 'dirs': self._dirs}, f)
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except Exception as e:
+                print(f"Warning: could not write hash cache {self.path}: {e}")
+                try:
+                    tmp.unlink()
+                except Exception:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._dirs = {}
+            self._dirty = True
+
+    @staticmethod
+    def signature(st: os.stat_result) -> List[int]:
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def lookup(self, directory: Path, rel: str, st: os.stat_result, algorithm: str) -> Optional[str]:
+        """Return the cached `algorithm` digest for `rel` under `directory` if its stat signature is unchanged."""
+        with self._lock:
+            rec = self._dirs.get(str(directory), {}).get(rel)
+        if rec and rec[:3] == self.signature(st) and content_hash.digest_algorithm(rec[3]) == algorithm:
+            return rec[3]
+        return None
+
+    def replace_directory(self, directory: Path, records: Dict[str, List]):
+        """Store the complete set of file records for `directory` (files not listed are forgotten)."""
+        cutoff = time.time_ns() - RACY_WINDOW_NS
+        records = {rel: rec for rel, rec in records.items() if rec[1] < cutoff}
+        key = str(directory)
+        with self._lock:
+            if self._dirs.get(key) != records:
+                self._dirs[key] = records
+                self._dirty = True
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 @dataclass
 class SaveEntry:
@@ -15,8 +15,41 @@ class SaveEntry:
     # Additional diagnostics used by the GUI for better sync decisions
     file_count: int = 0             # number of files in the save folder (exclude ExtraData0/1)
     max_file_size: int = 0          # size in bytes of the largest individual file in the folder
-    # Per-slot diagnostics for Ryujinx (slot name -> {hash, modified_time, file_count, max_file_size})
+    # Per-slot diagnostics for Ryujinx (slot name -> {hash, modified_time, file_count, max_file_size, manifest, path})
     slots: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Per-file content manifest: relative path -> (size, digest) (primary slot for Ryujinx)
+    manifest: Dict[str, Tuple[int, str]] = field(default_factory=dict)
+
+@dataclass
+class SaveTreeStats:
+    """Everything SaveScanner needs from one save folder, gathered in a single traversal."""
+    hash: str = ''
+    latest_mtime: float = 0.0       # newest file mtime (excluding ExtraData0/1)
+    file_count: int = 0             # number of files (excluding ExtraData0/1)
+    max_file_size: int = 0          # largest file in bytes (excluding ExtraData0/1)
+    has_files: bool = False         # any file at all, ExtraData included
+    manifest: Dict[str, Tuple[int, str]] = field(default_factory=dict)  # relative path -> (size, digest)
+
+@dataclass
+class SyncResult:
+    title_id: str
+    status: str                     # 'synced' | 'skipped' (destination already held identical data) | 'restored' | 'failed' | 'cancelled'
+    destinations: List[Path] = field(default_factory=list)  # folders actually written
+    duration: float = 0.0           # seconds spent in SyncEngine.sync (set by BatchSyncExecutor)
+    error: Optional[str] = None     # set when status == 'failed'
+
+@dataclass
+class BackupResult:
+    entry: SaveEntry
+    status: str                     # 'backed_up' | 'skipped' (empty, or latest backup identical) | 'failed' | 'cancelled'
+    archive: Optional[Path] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+
+@dataclass
+class SyncJob:
+    source: SaveEntry
+    destination: SaveEntry
 
 @dataclass
 class GameInfo:
@@ -35,3 +68,13 @@ class Config:
     nswdb_xml_path: Path
     mapping_path: Path  # where folderID→titleID map is stored
     max_backups: int = 10
+    hash_cache_path: Optional[Path] = Path(".hash_cache.json")  # per-file digest cache (None disables)
+    scan_workers: int = 4           # folders hashed concurrently while scanning (1 = sequential)
+    hash_algorithm: str = 'sha256'  # content digest algorithm (see content_hash.ALGORITHMS)
+    delta_sync: bool = True         # only write changed files when syncing (unchanged ones are hardlinked)
+    sync_workers: int = 4           # titles synced concurrently by Sync All (1 = sequential)
+    backup_workers: int = 0         # saves archived concurrently by Backup All (0 = one per CPU)
+    dedup_backups: bool = False     # back up into the content-addressed blob store instead of zips
+    backup_compression: str = 'deflate'         # zip method: 'stored' | 'deflate' | 'bzip2' | 'lzma'
+    backup_compresslevel: Optional[int] = None  # deflate 0-9 / bzip2 1-9 (None = library default)
+    backup_probe_compression: bool = True       # store files a quick zlib probe finds incompressible
@@ -1,14 +1,57 @@
 import json
+import sqlite3
+import threading
 import urllib.request
+from array import array
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
 from models import GameInfo
 
+
+class TitleIdSet:
+    """Compact, read-only set of TitleIDs stored as a sorted array of 64-bit integers.
+
+    Supports `"0100ABCD..." in ids` with hex strings in any case, so it can stand in
+    for a set of TitleID strings (e.g. FolderMap.resolve_citron_user's known_title_ids)
+    at roughly a tenth of the memory.
+    """
+
+    def __init__(self, title_ids: Iterable[str] = ()):
+        values = set()
+        for tid in title_ids:
+            try:
+                values.add(int(tid, 16))
+            except (TypeError, ValueError):
+                continue
+        self._ids = array('Q', sorted(values))
+
+    def __contains__(self, title_id) -> bool:
+        if not isinstance(title_id, str) or len(title_id) != 16:
+            return False
+        try:
+            value = int(title_id, 16)
+        except (TypeError, ValueError):
+            return False
+        i = bisect_left(self._ids, value)
+        return i < len(self._ids) and self._ids[i] == value
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return (f"{v:016X}" for v in self._ids)
+
+
 class NSWDBParser:
     """Load and merge titledb JSON files (US.en, JP.ja, HK.zh) from local disk or GitHub.
 
     - Keeps the first-seen entry per TitleID (no overwrites).
     - Automatically downloads missing/invalid files into the same folder as the provided `json_path`.
+    - Compiles the merged titles into a local sqlite cache that is only rebuilt when a
+      source file's size or mtime changes, so warm loads skip JSON parsing entirely.
+    - With `lazy=True`, `game_lookup` stays empty: `get_game_info` queries the cache on
+      demand (memoized) and `known_title_ids()` returns a compact TitleIdSet.
     """
 
     DB_FILES = {
@@ -18,55 +61,141 @@ class NSWDBParser:
         "GB.en.json": "https://raw.githubusercontent.com/blawar/titledb/refs/heads/master/GB.en.json",
     }
 
-    def __init__(self, json_path: Path):
+    CACHE_FILE = ".titledb_cache.sqlite"
+    CACHE_VERSION = 1
+
+    def __init__(self, json_path: Path, lazy: bool = False):
         # `json_path` stays backward-compatible (usually Path('US.en.json'))
         self.json_path = json_path
         self.db_dir = json_path.parent or Path('.')
+        self.cache_path = self.db_dir / self.CACHE_FILE
+        self.lazy = lazy
         self.game_lookup: Dict[str, GameInfo] = {}
+        # Lazy mode: open cache connection (shared by scanner threads) and memoized lookups
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._memo: Dict[str, Optional[GameInfo]] = {}
+        self._known_ids: Optional[TitleIdSet] = None
 
     def load(self):
-        # Try to load/ensure each DB file (US / JP / HK)
-        for fname, url in self.DB_FILES.items():
-            path = self.db_dir / fname
-            if not path.exists() or self._is_file_empty_or_invalid(path):
-                print(f"{fname} not found or invalid, attempting download from {url}...")
-                try:
-                    self._download_file(url, path)
-                except Exception as e:
-                    print(f"Warning: download of {fname} failed — continuing without it: {e}")
-                    continue
+        """Fill `game_lookup` from the compiled title cache, rebuilding it only when a source JSON changed.
 
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-            except Exception:
-                data = {}
-
-            for entry in data.values():
-                title_id = entry.get("id")
-                name = entry.get("name")
-                publisher = entry.get("publisher")
-                region = entry.get("region")
-
-                if title_id and name:
-                    tid = title_id.upper()
-                    # Keep the first-seen entry for a TitleID (avoid overwriting)
-                    if tid in self.game_lookup:
+        The cache records each source file's (size, mtime_ns); when they all still match,
+        no JSON is parsed at all.
+        """
+        conn = self._open_cache()
+        try:
+            recorded = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT name, size, mtime_ns FROM sources")}
+            parsed = {}
+            current = {}
+            # Try to load/ensure each DB file (US / JP / HK / GB)
+            for fname, url in self.DB_FILES.items():
+                path = self.db_dir / fname
+                stamp = self._stamp(path)
+                if stamp is not None and recorded.get(fname) == stamp:
+                    # Unchanged since it was compiled into the cache — known to be valid
+                    current[fname] = stamp
+                    continue
+                data = self._read_json(path) if stamp is not None else None
+                if data is None:
+                    print(f"{fname} not found or invalid, attempting download from {url}...")
+                    try:
+                        self._download_file(url, path)
+                    except Exception as e:
+                        print(f"Warning: download of {fname} failed — continuing without it: {e}")
                         continue
-                    self.game_lookup[tid] = GameInfo(
-                        title_id=tid,
-                        name=name.strip(),
-                        publisher=publisher,
-                        region=region
-                    )
-
-    def _is_file_empty_or_invalid(self, path: Path) -> bool:
+                    data = self._read_json(path) or {}
+                parsed[fname] = data
+                current[fname] = self._stamp(path)
+
+            if current != recorded:
+                self._rebuild_cache(conn, current, parsed)
+
+            if self.lazy:
+                self.close()
+                self._conn, conn = conn, None
+                return
+            for tid, name, publisher, region in conn.execute("SELECT title_id, name, publisher, region FROM titles"):
+                self.game_lookup[tid] = GameInfo(title_id=tid, name=name, publisher=publisher, region=region)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """Release the lazy-mode cache connection and memoized lookups."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._memo.clear()
+            self._known_ids = None
+
+    def _open_cache(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.DatabaseError:
+            # Corrupt cache file: start over
+            conn.close()
+            self.cache_path.unlink()
+            conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+            version = 0
+        if version != self.CACHE_VERSION:
+            conn.executescript(f"""
+                DROP TABLE IF EXISTS sources;
+                DROP TABLE IF EXISTS titles;
+                CREATE TABLE sources (name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+                CREATE TABLE titles (title_id TEXT PRIMARY KEY, name TEXT NOT NULL,
+                                     publisher TEXT, region TEXT) WITHOUT ROWID;
+                PRAGMA user_version = {self.CACHE_VERSION};
+            """)
+        return conn
+
+    def _rebuild_cache(self, conn: sqlite3.Connection, stamps: Dict[str, Tuple[int, int]], parsed: Dict[str, dict]):
+        """Recompile the titles table from the source JSON files, in DB_FILES priority order."""
+        with conn:
+            conn.execute("DELETE FROM titles")
+            conn.execute("DELETE FROM sources")
+            for fname in self.DB_FILES:
+                if fname not in stamps:
+                    continue
+                data = parsed.get(fname)
+                if data is None:
+                    data = self._read_json(self.db_dir / fname) or {}
+                # Keep the first-seen entry for a TitleID (avoid overwriting)
+                conn.executemany(
+                    "INSERT OR IGNORE INTO titles (title_id, name, publisher, region) VALUES (?, ?, ?, ?)",
+                    self._iter_titles(data)
+                )
+                conn.execute("INSERT INTO sources (name, size, mtime_ns) VALUES (?, ?, ?)", (fname, *stamps[fname]))
+
+    @staticmethod
+    def _iter_titles(data: dict):
+        for entry in data.values():
+            if not isinstance(entry, dict):
+                continue
+            title_id = entry.get("id")
+            name = entry.get("name")
+            if title_id and name:
+                yield title_id.upper(), name.strip(), entry.get("publisher"), entry.get("region")
+
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def _read_json(path: Path) -> Optional[dict]:
+        """Parse a titledb file; None when it is missing, empty or invalid."""
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                json.load(f)
-            return False
+                data = json.load(f)
+            return data if isinstance(data, dict) else None
         except Exception:
-            return True
+            return None
 
     def _download_file(self, url: str, target_path: Path):
         try:
@@ -92,4 +221,28 @@ class NSWDBParser:
     def get_game_info(self, title_id: str) -> Optional[GameInfo]:
         if not title_id:
             return None
-        return self.game_lookup.get(title_id.upper())
+        tid = title_id.upper()
+        if not self.lazy:
+            return self.game_lookup.get(tid)
+        with self._lock:
+            if tid in self._memo:
+                return self._memo[tid]
+            info = None
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT name, publisher, region FROM titles WHERE title_id = ?", (tid,)
+                ).fetchone()
+                if row:
+                    info = GameInfo(title_id=tid, name=row[0], publisher=row[1], region=row[2])
+            self._memo[tid] = info
+            return info
+
+    def known_title_ids(self):
+        """Every TitleID in the database: a set in eager mode, a compact TitleIdSet in lazy mode."""
+        if not self.lazy:
+            return set(self.game_lookup.keys())
+        with self._lock:
+            if self._known_ids is None:
+                rows = self._conn.execute("SELECT title_id FROM titles") if self._conn is not None else []
+                self._known_ids = TitleIdSet(row[0] for row in rows)
+            return self._known_ids
@@ -0,0 +1,114 @@
+"""
+save_manifest.py — helpers for comparing per-file save manifests.
+
+A manifest maps each file's relative POSIX path to (size, digest). SaveScanner records
+one per SaveEntry and per Ryujinx slot, so status checks are dictionary comparisons
+and never re-read save files.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import content_hash
+
+Manifest = Dict[str, Tuple[int, str]]
+
+# Ryujinx metadata files that never count as save content
+EXTRA_DATA_NAMES = frozenset({"ExtraData0", "ExtraData1"})
+
+
+def strip_extra_data(manifest: Manifest) -> Manifest:
+    """Return `manifest` without ExtraData0/ExtraData1 entries (at any depth)."""
+    return {rel: v for rel, v in manifest.items() if rel.rsplit('/', 1)[-1] not in EXTRA_DATA_NAMES}
+
+
+def is_subset(part: Manifest, whole: Manifest) -> bool:
+    """True if every file in `part` exists in `whole` with the same size and digest."""
+    return all(whole.get(rel) == v for rel, v in part.items())
+
+
+def differing_files(a: Manifest, b: Manifest) -> List[str]:
+    """Relative paths present on only one side or whose size/digest differ, sorted."""
+    return sorted(rel for rel in a.keys() | b.keys() if a.get(rel) != b.get(rel))
+
+
+def classify(r, c, has_ryujinx_mapping: bool) -> Dict:
+    """Sync status of one title from its Ryujinx (`r`) and Citron (`c`) SaveEntry, either may be None.
+
+    Returns {'status': ...} with one of 'match', 'ryujinx_newer', 'citron_newer',
+    'unsynced' (same modification time), 'only_ryujinx', 'only_citron' or
+    'needs_ryujinx_init' (Citron only and no Ryujinx folder to copy into yet).
+    A match against a non-primary Ryujinx slot adds 'ryujinx_slot'; saves that differ
+    add 'files_differ', the number of files whose content differs.
+    """
+    if r and c:
+        # Exact match against the canonical (primary) Ryujinx slot
+        if r.hash == c.hash:
+            return {'status': 'match'}
+        # Any slot holding the same data — or all of Citron's files — also counts as a match
+        for sname, sinfo in r.slots.items():
+            if sinfo.get('hash') == c.hash:
+                return {'status': 'match', 'ryujinx_slot': sname}
+        citron_files = strip_extra_data(c.manifest)
+        for sname, sinfo in r.slots.items():
+            if is_subset(citron_files, sinfo.get('manifest', {})):
+                return {'status': 'match', 'ryujinx_slot': sname}
+        if r.modified_time > c.modified_time:
+            status = 'ryujinx_newer'
+        elif c.modified_time > r.modified_time:
+            status = 'citron_newer'
+        else:
+            status = 'unsynced'
+        changed = differing_files(strip_extra_data(r.manifest), citron_files)
+        return {'status': status, 'files_differ': len(changed)}
+    if r:
+        return {'status': 'only_ryujinx'}
+    return {'status': 'only_citron' if has_ryujinx_mapping else 'needs_ryujinx_init'}
+
+
+def iter_files(directory: Path) -> Iterator[Tuple[str, Path, os.stat_result]]:
+    """Yield (relative posix path, path, stat) for every file under `directory`.
+
+    Uses os.scandir so each file costs exactly one stat call; symlinked
+    directories are not followed (same as Path.rglob).
+    """
+    stack = [(str(directory), '')]
+    while stack:
+        current, prefix = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, prefix + entry.name + '/'))
+                        elif entry.is_file():
+                            yield prefix + entry.name, Path(entry.path), entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def file_digest(directory: Path, rel: str, st: os.stat_result, algorithm: str, hash_cache=None) -> Optional[str]:
+    """Tagged digest of `directory/rel`, served from `hash_cache` when its stat signature is unchanged."""
+    if hash_cache is not None:
+        cached = hash_cache.lookup(directory, rel, st, algorithm)
+        if cached is not None:
+            return cached
+    try:
+        return content_hash.hash_file(directory / rel, algorithm)
+    except OSError:
+        return None
+
+
+def build_manifest(directory: Path, algorithm: str, hash_cache=None, files=None) -> Manifest:
+    """Manifest of every file under `directory` (unreadable files get a size-only placeholder digest).
+
+    `files` may pass an iter_files() listing the caller already has, to avoid walking twice.
+    """
+    manifest = {}
+    for rel, _, st in (iter_files(directory) if files is None else files):
+        digest = file_digest(directory, rel, st, algorithm, hash_cache)
+        manifest[rel] = (st.st_size, digest if digest is not None else f"UNREADABLE:{st.st_size}")
+    return manifest
@@ -1,128 +1,216 @@
-import hashlib
+import os
 import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set, Tuple
 
-from models import SaveEntry, GameInfo
+from models import SaveEntry, GameInfo, SaveTreeStats
 from nswdb_parser import NSWDBParser
 from foldermap import FolderMap
+from hash_cache import HashCache
+import content_hash
+from save_manifest import EXTRA_DATA_NAMES, iter_files, file_digest
+
+EntryCallback = Callable[[SaveEntry], None]
+ProgressCallback = Callable[[str, int, int], None]   # (source, folders done, folders total)
+
+# Bounds for locating a Ryujinx save root when no known layout matches the base
+RYUJINX_DISCOVERY_MAX_DEPTH = 6
+RYUJINX_DISCOVERY_DEADLINE = 2.0   # seconds
+# Directories that hold game data, caches or mods — never a save root, often huge
+RYUJINX_DISCOVERY_PRUNE = frozenset({
+    'games', 'mods', 'sdcard', 'shader', 'shaders', 'cache', 'logs', 'screenshots',
+    'system', 'contents', 'registered', 'amiibo', 'packaged', '.git',
+})
 
 class SaveScanner:
-    def __init__(self, config, nswdb_parser: NSWDBParser):
+    def __init__(self, config, nswdb_parser: NSWDBParser, force_rehash: bool = False):
         self.config = config
         self.nswdb = nswdb_parser
         self.folder_map = FolderMap(config.mapping_path)
-
-    def scan_ryujinx(self) -> List[SaveEntry]:
-        save_entries = []
+        # Persistent stat-keyed digest cache; `force_rehash` ignores cached digests
+        # (the cache is still refreshed with the newly computed values).
+        cache_path = getattr(config, 'hash_cache_path', None)
+        self.hash_cache = HashCache(cache_path) if cache_path else None
+        self.force_rehash = force_rehash
+        # Shared hashing pool while scan_all() runs both roots concurrently
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Roots used by the last scan (what a SaveWatcher should watch)
+        self.ryujinx_root: Optional[Path] = None
+        self.citron_root: Optional[Path] = None
+
+    def scan_all(self, on_entry: Optional[EntryCallback] = None, on_progress: Optional[ProgressCallback] = None,
+                 cancel: Optional[threading.Event] = None) -> Tuple[List[SaveEntry], List[SaveEntry]]:
+        """Scan both emulator roots at the same time and return (ryujinx_entries, citron_entries).
+
+        Both scans share one bounded worker pool for hashing. The Citron user is resolved
+        on the calling thread first because it may need to prompt the user.
+
+        Optional streaming hooks (called from worker threads):
+        - on_entry(entry) as soon as a title folder has been scanned
+        - on_progress(source, done, total) after every folder of that emulator's root
+        Setting `cancel` stops scheduling new folders; the partial results are returned.
+        """
+        if self._workers() <= 1:
+            return (self.scan_ryujinx(on_entry, on_progress, cancel),
+                    self.scan_citron(on_entry, on_progress, cancel))
+
+        self.folder_map.resolve_citron_user(self.config.citron_base, self.nswdb.known_title_ids())
+        with ThreadPoolExecutor(max_workers=self._workers(), thread_name_prefix='save-scan') as pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix='save-scan-root') as root_pool:
+            self._executor = pool
+            try:
+                ryujinx_future = root_pool.submit(self.scan_ryujinx, on_entry, on_progress, cancel)
+                citron_entries = self.scan_citron(on_entry, on_progress, cancel)
+                return ryujinx_future.result(), citron_entries
+            finally:
+                self._executor = None
+
+    def scan_ryujinx(self, on_entry: Optional[EntryCallback] = None, on_progress: Optional[ProgressCallback] = None,
+                     cancel: Optional[threading.Event] = None) -> List[SaveEntry]:
         save_root = self._resolve_ryujinx_save_root()
 
         if not save_root or not save_root.exists():
+            self.ryujinx_root = None
             return []
+        self.ryujinx_root = save_root
 
-        for folder in save_root.iterdir():
-            if not folder.is_dir():
-                continue
-
-            extra_data = folder / "ExtraData0"
-
-            # If ExtraData0 exists we can determine the TitleID — register a folder mapping
-            # for known titleIDs even if the numeric slot folders are currently empty.
-            if not extra_data.exists():
-                continue
-
-            title_id = self._parse_title_id(extra_data)
-            if not title_id:
-                continue
-
-            # Validate TitleID against NSWDB and persist the mapping for *known* titles.
+        folders = sorted((f for f in save_root.iterdir() if f.is_dir()), key=lambda f: f.name)
+        report = self._reporter("ryujinx", len(folders), on_entry, on_progress)
+        results = self._map(self._scan_ryujinx_folder, folders, cancel, lambda res: report(res[2]))
+        save_entries = []
+        for folder, result in zip(folders, results):
+            if result is None:
+                continue  # cancelled before this folder was scanned
+            title_id, known, entry = result
+            # Persist the mapping for *known* titles on the calling thread.
             # (Do not persist unknown/invalid titleIDs — keep prior behavior.)
-            game_info = self.nswdb.get_game_info(title_id)
-            if game_info:
+            if known:
                 self.folder_map.register_ryujinx_folder(folder.name, title_id)
+            if entry:
+                save_entries.append(entry)
 
-            # Ryujinx may store per-user slots under numeric names (0, 1, 2...).
-            # Detect any numeric slot directory and prefer the most-recent non-empty slot.
-            existing_slots = [s for s in folder.iterdir() if s.is_dir() and s.name.isdigit()]
+        # One write for every folder registered during this scan
+        self.folder_map.flush()
+        if self.hash_cache:
+            self.hash_cache.save()
+        return save_entries
 
-            # Consider numeric slot directories and collect per-slot diagnostics
-            non_empty_slots = [s for s in existing_slots if any(f.is_file() for f in s.rglob("*"))]
-            if not non_empty_slots:
-                continue
+    def scan_changed(self, changes: Dict[str, Set[str]]) -> Tuple[List[SaveEntry], List[Tuple[str, str]]]:
+        """Rescan only the given top-level folders of the last scan's roots.
 
-            def _slot_latest_mtime(s: Path) -> float:
-                try:
-                    return max((f.stat().st_mtime for f in s.rglob("*") if f.is_file()), default=0.0)
-                except Exception:
-                    return 0.0
-
-            # Choose the primary slot (most-recent non-empty) for the SaveEntry.path/hash
-            primary_slot = max(non_empty_slots, key=_slot_latest_mtime)
-
-            # Gather per-slot metrics and also aggregate totals for the Ryujinx SaveEntry
-            slots_info = {}
-            aggregated_file_count = 0
-            aggregated_max_size = 0
-            aggregated_latest = 0.0
-
-            for s in non_empty_slots:
-                slot_hash = self._hash_directory(s)
-                slot_mtime = self._latest_mod_time(s)
-                slot_file_count = 0
-                slot_max_size = 0
-                for f in s.rglob("*"):
-                    if not f.is_file():
-                        continue
-                    if f.name in ("ExtraData0", "ExtraData1"):
-                        continue
-                    slot_file_count += 1
-                    try:
-                        sz = f.stat().st_size
-                    except Exception:
-                        sz = 0
-                    if sz > slot_max_size:
-                        slot_max_size = sz
-                slots_info[s.name] = {
-                    'hash': slot_hash,
-                    'modified_time': slot_mtime,
-                    'file_count': slot_file_count,
-                    'max_file_size': slot_max_size,
-                    'path': s,
-                }
-                aggregated_file_count += slot_file_count
-                if slot_max_size > aggregated_max_size:
-                    aggregated_max_size = slot_max_size
-                mt = 0.0
-                try:
-                    mt = max((f.stat().st_mtime for f in s.rglob('*') if f.is_file()), default=0.0)
-                except Exception:
-                    mt = 0.0
-                if mt > aggregated_latest:
-                    aggregated_latest = mt
-
-            # If game_info wasn't found earlier (unknown titleID), represent it as Unknown for the SaveEntry
-            if not game_info:
-                game_info = GameInfo(title_id=title_id, name="_Unknown (Not found in titleID json files)")
-
-            # Primary slot determines the canonical hash/path for backward-compatible behavior
-            primary_hash = slots_info[primary_slot.name]['hash']
-            last_modified = datetime.fromtimestamp(aggregated_latest) if aggregated_latest else self._latest_mod_time(primary_slot)
-
-            save_entries.append(SaveEntry(
-                title_id=title_id,
-                game_name=game_info.name,
-                source="ryujinx",
-                folder_id=folder.name,
-                path=primary_slot,
-                modified_time=last_modified,
-                hash=primary_hash,
-                file_count=aggregated_file_count,
-                max_file_size=aggregated_max_size,
-                slots=slots_info
-            ))
-
-        return save_entries
+        `changes` maps 'ryujinx' to folder ids and 'citron' to TitleID folder names (as
+        reported by SaveWatcher.poll). Returns (fresh entries, removed (title_id, source)):
+        a folder that vanished or no longer holds a save is reported as removed.
+        """
+        entries: List[SaveEntry] = []
+        removed: List[Tuple[str, str]] = []
+
+        if self.ryujinx_root is not None and changes.get('ryujinx'):
+            folders = [self.ryujinx_root / name for name in sorted(changes['ryujinx'])]
+            present = [f for f in folders if f.is_dir()]
+            for folder in folders:
+                if folder not in present:
+                    title_id = self.folder_map.get_ryujinx_title_id(folder.name)
+                    if title_id:
+                        removed.append((title_id, 'ryujinx'))
+            for folder, (title_id, known, entry) in zip(present, self._map(self._scan_ryujinx_folder, present)):
+                if known:
+                    self.folder_map.register_ryujinx_folder(folder.name, title_id)
+                if entry:
+                    entries.append(entry)
+                elif title_id:
+                    removed.append((title_id, 'ryujinx'))
+            self.folder_map.flush()
+
+        user_id = self.folder_map.cached_citron_user
+        if self.citron_root is not None and user_id and changes.get('citron'):
+            folders = [self.citron_root / name for name in sorted(changes['citron'])]
+            present = [f for f in folders if f.is_dir()]
+            results = self._map(lambda f: self._scan_citron_folder(f, user_id), present)
+            for folder in folders:
+                entry = results[present.index(folder)] if folder in present else None
+                if entry:
+                    entries.append(entry)
+                else:
+                    removed.append((folder.name.upper(), 'citron'))
+
+        if self.hash_cache:
+            self.hash_cache.save()
+        return entries, removed
+
+    def _scan_ryujinx_folder(self, folder: Path) -> Tuple[Optional[str], bool, Optional[SaveEntry]]:
+        """Scan one Ryujinx <folder_id> directory; returns (title_id, is_known_title, entry)."""
+        extra_data = folder / "ExtraData0"
+
+        # If ExtraData0 exists we can determine the TitleID — the mapping is registered
+        # for known titleIDs even if the numeric slot folders are currently empty.
+        if not extra_data.exists():
+            return None, False, None
+
+        title_id = self._parse_title_id(extra_data)
+        if not title_id:
+            return None, False, None
+
+        # Validate TitleID against NSWDB
+        game_info = self.nswdb.get_game_info(title_id)
+        known = game_info is not None
+
+        # Ryujinx may store per-user slots under numeric names (0, 1, 2...).
+        # Walk each numeric slot once and prefer the most-recent non-empty slot.
+        existing_slots = sorted((s for s in folder.iterdir() if s.is_dir() and s.name.isdigit()), key=lambda s: s.name)
+        non_empty_slots = []
+        for s in existing_slots:
+            stats = self._walk_save_tree(s)
+            if stats.has_files:
+                non_empty_slots.append((s, stats))
+        if not non_empty_slots:
+            return title_id, known, None
+
+        # Choose the primary slot (most-recent non-empty) for the SaveEntry.path/hash
+        primary_slot, _ = max(non_empty_slots, key=lambda pair: pair[1].latest_mtime)
+
+        # Gather per-slot metrics and also aggregate totals for the Ryujinx SaveEntry
+        slots_info = {}
+        aggregated_file_count = 0
+        aggregated_max_size = 0
+        aggregated_latest = 0.0
+
+        for s, stats in non_empty_slots:
+            slots_info[s.name] = {
+                'hash': stats.hash,
+                'modified_time': datetime.fromtimestamp(stats.latest_mtime),
+                'file_count': stats.file_count,
+                'max_file_size': stats.max_file_size,
+                'manifest': stats.manifest,
+                'path': s,
+            }
+            aggregated_file_count += stats.file_count
+            aggregated_max_size = max(aggregated_max_size, stats.max_file_size)
+            aggregated_latest = max(aggregated_latest, stats.latest_mtime)
+
+        # If game_info wasn't found (unknown titleID), represent it as Unknown for the SaveEntry
+        if not game_info:
+            game_info = GameInfo(title_id=title_id, name="_Unknown (Not found in titleID json files)")
+
+        # Primary slot determines the canonical hash/path for backward-compatible behavior
+        entry = SaveEntry(
+            title_id=title_id,
+            game_name=game_info.name,
+            source="ryujinx",
+            folder_id=folder.name,
+            path=primary_slot,
+            modified_time=datetime.fromtimestamp(aggregated_latest),
+            hash=slots_info[primary_slot.name]['hash'],
+            file_count=aggregated_file_count,
+            max_file_size=aggregated_max_size,
+            slots=slots_info,
+            manifest=slots_info[primary_slot.name]['manifest']
+        )
+        return title_id, known, entry
 
     def _resolve_ryujinx_save_root(self):
         """Detect the most likely Ryujinx save root under the configured base."""
@@ -135,99 +223,138 @@ class SaveScanner:
             base / "portable/user/save",
             base,
         ]
-        for cand in candidates:
+        for cand in candidates[:-1]:
             if cand.exists() and cand.is_dir():
                 return cand
-        # As a fallback, try to find a folder containing ExtraData0 somewhere under base
-        try:
-            for p in base.rglob("ExtraData0"):
-                # ExtraData0 is inside <folder>/ExtraData0, so parent.parent should be save root structure
-                possible = p.parents[1]
-                if possible.exists():
-                    return possible
-        except Exception:
-            pass
+        if not base.is_dir():
+            return None
+
+        # Unusual layout: reuse the root found by an earlier discovery while it is still valid
+        recorded = self.folder_map.recorded_ryujinx_root(base)
+        if recorded is not None:
+            return recorded
+
+        # As a fallback, look for a folder containing <folder>/ExtraData0 under base,
+        # shallowest first, skipping heavy directories and giving up after a deadline
+        found = self._discover_ryujinx_save_root(base)
+        if found is not None:
+            self.folder_map.remember_ryujinx_root(base, found)
+            return found
+        return base
+
+    def _discover_ryujinx_save_root(self, base: Path) -> Optional[Path]:
+        deadline = time.monotonic() + RYUJINX_DISCOVERY_DEADLINE
+        level = [str(base)]
+        for _depth in range(RYUJINX_DISCOVERY_MAX_DEPTH + 1):
+            next_level = []
+            for current in level:
+                if time.monotonic() > deadline:
+                    print(f"⚠️ Gave up looking for a Ryujinx save folder under {base} after {RYUJINX_DISCOVERY_DEADLINE:.0f}s")
+                    return None
+                try:
+                    with os.scandir(current) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.name == "ExtraData0" and entry.is_file():
+                            # ExtraData0 is inside <folder>/ExtraData0, so parent.parent is the save root
+                            return Path(current).parent
+                        if entry.is_dir(follow_symlinks=False) and entry.name.lower() not in RYUJINX_DISCOVERY_PRUNE:
+                            next_level.append(entry.path)
+                    except OSError:
+                        continue
+            level = next_level
+            if not level:
+                break
         return None
 
-    def scan_citron(self) -> List[SaveEntry]:
-        save_entries = []
-        known_ids = set(self.nswdb.game_lookup.keys())
+    def scan_citron(self, on_entry: Optional[EntryCallback] = None, on_progress: Optional[ProgressCallback] = None,
+                    cancel: Optional[threading.Event] = None) -> List[SaveEntry]:
+        known_ids = self.nswdb.known_title_ids()
         user_id = self.folder_map.resolve_citron_user(self.config.citron_base, known_ids)
         if not user_id:
             return []
 
-        # Determine actual save_root. Prefer any cached base discovered by FolderMap
-        cached_base = getattr(self.folder_map, 'cached_citron_base', None)
-        save_root = None
-        if cached_base:
-            # If cached_base already points to the 0000 folder
-            if cached_base.name == "0000000000000000":
-                save_root = cached_base / user_id
-            else:
-                # Try some likely subpaths under the cached base
-                candidates = [
-                    cached_base / "user/nand/user/save/0000000000000000" / user_id,
-                    cached_base / "user/save/0000000000000000" / user_id,
-                    cached_base / "user/nand/user/save" / user_id,
-                    cached_base / "user/save" / user_id,
-                    cached_base / user_id,
-                ]
-                for cand in candidates:
-                    if cand.exists() and cand.is_dir():
-                        save_root = cand
-                        break
-
-        if not save_root:
-            # Fallback to configured citron base
-            save_root = self.config.citron_base / "user/nand/user/save/0000000000000000" / user_id
-
-        for folder in save_root.iterdir():
-            if not folder.is_dir():
-                continue
-
-            # Skip empty save folders
-            if not any(f.is_file() for f in folder.rglob("*")):
-                continue
-
-            title_id = folder.name.upper()
-            # Citron mappings are not persisted (they are derived from the filesystem/user id)
-            # No persistent registration here - leave Ryujinx mappings separate.
-
-            game_info = self.nswdb.get_game_info(title_id) or GameInfo(title_id=title_id, name="Unknown")
-            file_hash = self._hash_directory(folder)
-            # Exclude ExtraData0/ExtraData1 when computing the 'last modified' time for Citron saves
-            last_modified = self._latest_mod_time(folder, exclude_names={"ExtraData0", "ExtraData1"})
-
-            # Compute file-count and largest-file (exclude ExtraData0/ExtraData1)
-            file_count = 0
-            max_size = 0
-            for f in folder.rglob("*"):
-                if not f.is_file():
-                    continue
-                if f.name in ("ExtraData0", "ExtraData1"):
-                    continue
-                file_count += 1
-                try:
-                    sz = f.stat().st_size
-                except Exception:
-                    sz = 0
-                if sz > max_size:
-                    max_size = sz
-
-            save_entries.append(SaveEntry(
-                title_id=title_id,
-                game_name=game_info.name,
-                source="citron",
-                folder_id=user_id,
-                path=folder,
-                modified_time=last_modified,
-                hash=file_hash,
-                file_count=file_count,
-                max_file_size=max_size
-            ))
+        # Remembered with the user (validated by FolderMap), so a warm start does no probing
+        save_root = self.folder_map.citron_save_root(self.config.citron_base, user_id)
+        self.citron_root = save_root
+
+        folders = sorted((f for f in save_root.iterdir() if f.is_dir()), key=lambda f: f.name)
+        report = self._reporter("citron", len(folders), on_entry, on_progress)
+        results = self._map(lambda f: self._scan_citron_folder(f, user_id), folders, cancel, report)
+        save_entries = [e for e in results if e]
 
+        if self.hash_cache:
+            self.hash_cache.save()
         return save_entries
 
+    def _scan_citron_folder(self, folder: Path, user_id: str) -> Optional[SaveEntry]:
+        # One walk yields the hash and all diagnostics; skip empty save folders
+        stats = self._walk_save_tree(folder)
+        if not stats.has_files:
+            return None
+
+        title_id = folder.name.upper()
+        # Citron mappings are not persisted (they are derived from the filesystem/user id)
+        # No persistent registration here - leave Ryujinx mappings separate.
+
+        game_info = self.nswdb.get_game_info(title_id) or GameInfo(title_id=title_id, name="Unknown")
+
+        return SaveEntry(
+            title_id=title_id,
+            game_name=game_info.name,
+            source="citron",
+            folder_id=user_id,
+            path=folder,
+            modified_time=datetime.fromtimestamp(stats.latest_mtime),
+            hash=stats.hash,
+            file_count=stats.file_count,
+            max_file_size=stats.max_file_size,
+            manifest=stats.manifest
+        )
+
+    def _workers(self) -> int:
+        return max(1, int(getattr(self.config, 'scan_workers', 1) or 1))
+
+    def _map(self, fn, items: list, cancel: Optional[threading.Event] = None, on_result=None) -> list:
+        """Apply `fn` to every item on the scan worker pool, preserving input order.
+
+        Items not started before `cancel` is set yield None; `on_result` sees every finished result.
+        """
+        def run(item):
+            if cancel is not None and cancel.is_set():
+                return None
+            result = fn(item)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        if self._workers() <= 1 or len(items) <= 1:
+            return [run(item) for item in items]
+        if self._executor is not None:
+            return list(self._executor.map(run, items))
+        with ThreadPoolExecutor(max_workers=self._workers(), thread_name_prefix='save-scan') as pool:
+            return list(pool.map(run, items))
+
+    @staticmethod
+    def _reporter(source: str, total: int, on_entry: Optional[EntryCallback], on_progress: Optional[ProgressCallback]):
+        """Build a thread-safe per-folder callback that forwards entries and progress counts."""
+        lock = threading.Lock()
+        done = 0
+
+        def report(entry: Optional[SaveEntry]):
+            nonlocal done
+            with lock:
+                done += 1
+                count = done
+            if entry is not None and on_entry is not None:
+                on_entry(entry)
+            if on_progress is not None:
+                on_progress(source, count, total)
+        return report
+
     def _parse_title_id(self, path: Path) -> Optional[str]:
         try:
             data = path.read_bytes()
@@ -243,45 +370,43 @@ class SaveScanner:
         return None
 
     def _hash_directory(self, directory: Path) -> str:
-        """Hash directory contents deterministically.
-        - include relative path to avoid collisions from identical filenames in different subfolders
-        - stream file contents to avoid large memory spikes
-        """
-        md5 = hashlib.md5()
-        for file in sorted(directory.rglob("*")):
-            if not file.is_file():
-                continue
-            rel = file.relative_to(directory).as_posix().encode('utf-8')
-            md5.update(rel)
-            # stream file contents
-            try:
-                with file.open('rb') as fh:
-                    while True:
-                        chunk = fh.read(8192)
-                        if not chunk:
-                            break
-                        md5.update(chunk)
-            except Exception:
-                # if a file can't be read, include its name + size as a fallback
-                try:
-                    md5.update(f"UNREADABLE:{file.name}:{file.stat().st_size}".encode())
-                except Exception:
-                    md5.update(file.name.encode())
-        return md5.hexdigest()
+        return self._walk_save_tree(directory).hash
 
-    def _latest_mod_time(self, directory: Path, exclude_names: Optional[set] = None) -> datetime:
-        """Return the latest modification time for files under `directory`.
+    def _walk_save_tree(self, directory: Path, exclude_names: set = EXTRA_DATA_NAMES) -> SaveTreeStats:
+        """Collect hash, manifest, latest mtime, file count, largest file and non-empty flag in one traversal.
 
-        If `exclude_names` is provided, files whose name matches any entry in the set
-        are ignored (useful to exclude ExtraData0/ExtraData1 metadata files).
+        The hash is content_hash.fingerprint() of the manifest, so it is deterministic.
+        Per-file digests are reused from the hash cache when the file's stat signature is unchanged.
+        Files named in `exclude_names` (ExtraData0/ExtraData1 by default) are hashed but
+        do not count towards the mtime, file-count and largest-file diagnostics.
         """
-        if exclude_names is None:
-            exclude_names = set()
-        latest = max(
-            (f.stat().st_mtime for f in directory.rglob("*") if f.is_file() and f.name not in exclude_names),
-            default=0.0
-        )
-        # If no files found, default returns 0.0; convert to datetime
-        if latest:
-            return datetime.fromtimestamp(latest)
-        return datetime.fromtimestamp(0)
+        stats = SaveTreeStats()
+        algorithm = self._hash_algorithm()
+        files = list(iter_files(directory))
+        if not files:
+            stats.hash = content_hash.fingerprint({}, algorithm)
+            return stats
+
+        stats.has_files = True
+        records = {}
+        for rel, file, st in files:
+            if file.name not in exclude_names:
+                stats.file_count += 1
+                stats.max_file_size = max(stats.max_file_size, st.st_size)
+                stats.latest_mtime = max(stats.latest_mtime, st.st_mtime)
+
+            digest = file_digest(directory, rel, st, algorithm, None if self.force_rehash else self.hash_cache)
+            if digest is None:
+                # if a file can't be read, include its size as a fallback (and don't cache it)
+                digest = f"UNREADABLE:{st.st_size}"
+            else:
+                records[rel] = HashCache.signature(st) + [digest]
+            stats.manifest[rel] = (st.st_size, digest)
+
+        if self.hash_cache:
+            self.hash_cache.replace_directory(directory, records)
+        stats.hash = content_hash.fingerprint(stats.manifest, algorithm)
+        return stats
+
+    def _hash_algorithm(self) -> str:
+        return getattr(self.config, 'hash_algorithm', None) or content_hash.DEFAULT_ALGORITHM
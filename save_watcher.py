@@ -0,0 +1,235 @@
+"""
+save_watcher.py — reports which save folders changed since the last poll.
+
+A SaveWatcher watches each emulator's save root ({'ryujinx': <save root>,
+'citron': <user folder>}) and poll() returns, per source, the names of the
+top-level folders (Ryujinx folder ids / Citron TitleIDs) whose contents changed,
+appeared or disappeared. SaveScanner.scan_changed() rescans just those.
+
+On Linux the inotify API is used through ctypes (no extra dependency): every
+directory under the roots gets a watch, and newly created or moved-in directories
+are added as they appear. Elsewhere — or when inotify is unavailable or runs out
+of watches — a portable fallback compares a snapshot of each folder's directory
+mtimes on every poll, and of every file's size/mtime (an in-place overwrite does
+not touch its directory's mtime) only every FULL_STAT_INTERVAL seconds, so an
+idle watcher does not keep sweeping every file on slow storage.
+
+poll() returns None when it cannot tell what changed (inotify queue overflow);
+callers should then do a full rescan.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+# inotify event bits (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+# Polling fallback: seconds between full file-stat sweeps (other polls read directory mtimes only)
+FULL_STAT_INTERVAL = 60.0
+
+
+def _ignored(name: str) -> bool:
+    # Staging folders of our own syncs/restores (.sync_tmp_*, .sync_old_*, .sync_payload_*)
+    return name.startswith('.')
+
+
+class _InotifyBackend:
+    def __init__(self, roots: Dict[str, Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._roots = roots
+        # watch descriptor -> (source, directory path)
+        self._watches: Dict[int, tuple] = {}
+        try:
+            for source, root in roots.items():
+                self._watch_tree(source, root)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, source: str, top: Path):
+        stack = [str(top)]
+        while stack:
+            current = stack.pop()
+            wd = self._add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == 28:  # ENOSPC: out of inotify watches
+                    raise OSError(err, "inotify watch limit reached")
+                continue  # vanished or unreadable; its parent's events still cover it
+            self._watches[wd] = (source, Path(current))
+            try:
+                with os.scandir(current) as it:
+                    stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def poll(self) -> Optional[Dict[str, Set[str]]]:
+        changes: Dict[str, Set[str]] = {}
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                name = buf[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                watch = self._watches.get(wd)
+                if watch is None:
+                    continue
+                source, directory = watch
+                if mask & IN_IGNORED:
+                    del self._watches[wd]
+                    continue
+                path = directory / os.fsdecode(name) if name else directory
+                folder = self._top_folder(source, path)
+                if folder is not None:
+                    changes.setdefault(source, set()).add(folder)
+                if name and mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # New (or renamed-into-place) directory: watch it and everything below
+                    try:
+                        self._watch_tree(source, path)
+                    except OSError:
+                        overflow = True
+        return None if overflow else changes
+
+    def _top_folder(self, source: str, path: Path) -> Optional[str]:
+        try:
+            rel = path.relative_to(self._roots[source])
+        except ValueError:
+            return None
+        if not rel.parts or _ignored(rel.parts[0]):
+            return None
+        return rel.parts[0]
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _MtimeBackend:
+    def __init__(self, roots: Dict[str, Path], full_interval: float = FULL_STAT_INTERVAL):
+        self._roots = roots
+        self._full_interval = full_interval
+        self._last_full = time.monotonic()
+        # source -> folder name -> (directory signature, file signature)
+        self._snapshot = {source: self._scan(root, None) for source, root in roots.items()}
+
+    @staticmethod
+    def _signature(folder: str, with_files: bool):
+        sig = []
+        stack = [folder]
+        while stack:
+            current = stack.pop()
+            try:
+                if not with_files:
+                    sig.append((current, os.stat(current).st_mtime_ns))
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif with_files and entry.is_file():
+                            st = entry.stat()
+                            sig.append((entry.path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                continue
+        return tuple(sorted(sig))
+
+    def _scan(self, root: Path, previous: Optional[Dict[str, tuple]]) -> Dict[str, tuple]:
+        """Signatures of every folder under `root`.
+
+        With `previous`, only directory mtimes are read; a folder's file signature is
+        recomputed just when its directories changed, otherwise carried over.
+        """
+        try:
+            with os.scandir(root) as it:
+                names = [e.name for e in it if e.is_dir(follow_symlinks=False) and not _ignored(e.name)]
+        except OSError:
+            return {}
+        snapshot = {}
+        for name in names:
+            folder = os.path.join(root, name)
+            dirs = self._signature(folder, False)
+            old = previous.get(name) if previous is not None else None
+            if old is not None and old[0] == dirs:
+                snapshot[name] = old
+            else:
+                snapshot[name] = (dirs, self._signature(folder, True))
+        return snapshot
+
+    def poll(self) -> Optional[Dict[str, Set[str]]]:
+        # Directory mtimes catch files being added, removed or renamed (how emulators
+        # usually write saves); an in-place overwrite only shows in the file stats, which
+        # are swept at the much longer full interval to keep idle polling cheap.
+        full = time.monotonic() - self._last_full >= self._full_interval
+        if full:
+            self._last_full = time.monotonic()
+        changes: Dict[str, Set[str]] = {}
+        for source, root in self._roots.items():
+            before = self._snapshot.get(source, {})
+            after = self._scan(root, None if full else before)
+            changed = {name for name in before.keys() | after.keys() if before.get(name) != after.get(name)}
+            if changed:
+                changes[source] = changed
+            self._snapshot[source] = after
+        return changes
+
+    def close(self):
+        pass
+
+
+class SaveWatcher:
+    def __init__(self, roots: Dict[str, Path], use_inotify: bool = True):
+        roots = {source: root for source, root in roots.items() if root is not None and root.is_dir()}
+        self.roots = roots
+        self._backend = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._backend = _InotifyBackend(roots)
+                self.backend = 'inotify'
+            except (OSError, AttributeError) as e:
+                print(f"ℹ️ inotify unavailable ({e}); watching saves by polling mtimes")
+        if self._backend is None:
+            self._backend = _MtimeBackend(roots)
+            self.backend = 'mtime'
+
+    def poll(self) -> Optional[Dict[str, Set[str]]]:
+        """Folders changed since the last poll, per source; None means "rescan everything"."""
+        return self._backend.poll()
+
+    def close(self):
+        self._backend.close()
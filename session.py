@@ -0,0 +1,201 @@
+"""
+session.py — long-lived application state shared across refreshes.
+
+SyncSession keeps one Config, NSWDBParser, FolderMap, SaveScanner and SyncEngine
+alive between scans and only rebuilds them when something they depend on changes:
+the emulator base paths, or the size/mtime of a titledb JSON file.
+After a complete scan, start_watching() tracks changed save folders (save_watcher.py)
+so rescan_changes() can refresh just those.
+It has no GUI dependencies so it can back both the Tk app and scripted use.
+"""
+
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from models import Config, SaveEntry
+from nswdb_parser import NSWDBParser
+from save_scanner import SaveScanner
+from syncengine import SyncEngine
+from foldermap import FolderMap
+from save_watcher import SaveWatcher
+
+
+class SyncSession:
+    def __init__(self,
+                 backup_dir: Path = Path("./backupHistory"),
+                 nswdb_path: Path = Path("US.en.json"),
+                 mapping_path: Path = Path("folder_mapping.json")):
+        self.backup_dir = backup_dir
+        self.nswdb_path = nswdb_path
+        self.mapping_path = mapping_path
+
+        self.config: Optional[Config] = None
+        self.nswdb: Optional[NSWDBParser] = None
+        self.folder_map: Optional[FolderMap] = None
+        self.scanner: Optional[SaveScanner] = None
+        self.engine: Optional[SyncEngine] = None
+        self.watcher: Optional[SaveWatcher] = None
+        self._db_stamp = None
+
+    def ensure(self, ryujinx_base: Path, citron_base: Path) -> bool:
+        """Make sure every component matches the given bases; returns True if anything was rebuilt."""
+        rebuilt = False
+        if self.config is None or self.config.ryujinx_base != ryujinx_base or self.config.citron_base != citron_base:
+            self.config = Config(
+                ryujinx_base=ryujinx_base,
+                citron_base=citron_base,
+                backup_dir=self.backup_dir,
+                nswdb_xml_path=self.nswdb_path,
+                mapping_path=self.mapping_path
+            )
+            self.scanner = None
+            self.engine = SyncEngine(self.config)
+            rebuilt = True
+
+        db_stamp = self._titledb_stamp()
+        if self.nswdb is None or db_stamp != self._db_stamp:
+            if self.nswdb is not None:
+                self.nswdb.close()
+            self.nswdb = NSWDBParser(self.config.nswdb_xml_path, lazy=True)
+            self.nswdb.load()
+            # load() may have downloaded files — stamp what is on disk now
+            self._db_stamp = self._titledb_stamp()
+            self.scanner = None
+            rebuilt = True
+
+        if self.folder_map is None:
+            self.folder_map = FolderMap(self.config.mapping_path)
+
+        if self.scanner is None:
+            self.stop_watching()
+            self.scanner = SaveScanner(self.config, self.nswdb)
+            self.scanner.folder_map = self.folder_map
+            # The engine reuses the scanner's digests for delta syncs
+            self.engine.hash_cache = self.scanner.hash_cache
+            rebuilt = True
+        return rebuilt
+
+    def reset_folder_mappings(self):
+        """Forget every persisted Ryujinx mapping and the resolved Citron user (e.g. after a base path change)."""
+        self.folder_map = FolderMap(self.mapping_path)
+        self.folder_map.clear()
+        self.folder_map.save()
+        if self.scanner is not None:
+            self.scanner.folder_map = self.folder_map
+
+    def scan(self, force_rehash: bool = False, on_entry=None, on_progress=None,
+             cancel: Optional[threading.Event] = None) -> Tuple[List[SaveEntry], List[SaveEntry]]:
+        """Scan both emulators with the long-lived scanner; returns (ryujinx_entries, citron_entries).
+
+        The streaming hooks and `cancel` are passed through to SaveScanner.scan_all.
+        """
+        self.scanner.force_rehash = force_rehash
+        try:
+            return self.scanner.scan_all(on_entry, on_progress, cancel)
+        finally:
+            self.scanner.force_rehash = False
+
+    def sync_destination(self, source: SaveEntry, existing: Optional[SaveEntry] = None) -> Tuple[Optional[SaveEntry], str]:
+        """Where syncing `source` into the other emulator writes, given that emulator's current save (if any).
+
+        Returns (destination entry, '') or (None, reason) when there is nowhere to write:
+        no resolved Citron user, no Ryujinx folder for the title, or no Ryujinx save root.
+        """
+        title_id = source.title_id
+        if source.source == 'ryujinx':
+            user_id = self.folder_map.cached_citron_user
+            if not user_id:
+                return None, "The Citron user folder could not be resolved."
+            save_root = self.scanner.citron_root
+            if save_root is None:
+                citron_base = self.folder_map.cached_citron_base or \
+                    self.config.citron_base / 'user/nand/user/save/0000000000000000'
+                save_root = citron_base / user_id
+            return SaveEntry(title_id, source.game_name, 'citron', user_id, save_root / title_id,
+                             source.modified_time, ''), ''
+
+        fid = self.folder_map.get_ryujinx_folder_id(title_id)
+        if not fid:
+            return None, "No Ryujinx folder mapping exists for this TitleID."
+        if existing is not None:
+            dest = existing.path
+        else:
+            # Found by the last scan, so it follows the actual install layout (portable, Flatpak, …)
+            if self.scanner.ryujinx_root is None:
+                return None, "The Ryujinx save folder could not be found."
+            ryu_folder = self.scanner.ryujinx_root / fid
+            # Detect preferred slot under the Ryujinx folder (prefer non-empty slots)
+            dest = ryu_folder / '0'
+            try:
+                candidates = [p for p in ryu_folder.iterdir() if p.is_dir() and p.name.isdigit()]
+                non_empty = [s for s in candidates if any(f.is_file() for f in s.rglob('*'))]
+                if non_empty:
+                    dest = max(non_empty, key=lambda s: max((f.stat().st_mtime for f in s.rglob('*') if f.is_file()), default=0.0))
+                elif candidates:
+                    dest = min(candidates, key=lambda p: int(p.name))
+            except OSError:
+                pass
+        return SaveEntry(title_id, source.game_name, 'ryujinx', fid, dest, source.modified_time, ''), ''
+
+    def start_watching(self, use_inotify: bool = True) -> SaveWatcher:
+        """(Re)start change tracking on the roots of the last scan; call after a complete scan."""
+        self.stop_watching()
+        self.watcher = SaveWatcher({'ryujinx': self.scanner.ryujinx_root, 'citron': self.scanner.citron_root},
+                                   use_inotify)
+        return self.watcher
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+
+    def rescan_changes(self) -> Optional[Tuple[List[SaveEntry], List[Tuple[str, str]]]]:
+        """Rescan only the save folders the watcher saw change.
+
+        Returns (fresh entries, removed (title_id, source)) — both empty when nothing
+        changed — or None if the watcher lost track and a full scan is needed.
+        """
+        if self.watcher is None:
+            return None
+        changes = self.watcher.poll()
+        if changes is None:
+            return None
+        if not changes:
+            return [], []
+        return self.scanner.scan_changed(changes)
+
+    def rescan_paths(self, paths: List[Path]) -> Optional[Tuple[List[SaveEntry], List[Tuple[str, str]]]]:
+        """Rescan only the save folders containing `paths` (e.g. what a sync or restore wrote).
+
+        Same result as rescan_changes(); None if a path lies outside the roots of the last scan.
+        """
+        roots = {'ryujinx': self.scanner.ryujinx_root, 'citron': self.scanner.citron_root}
+        changes = {}
+        for path in paths:
+            for source, root in roots.items():
+                if root is None:
+                    continue
+                try:
+                    rel = Path(path).relative_to(root)
+                except ValueError:
+                    continue
+                if rel.parts:
+                    changes.setdefault(source, set()).add(rel.parts[0])
+                    break
+            else:
+                return None
+        if not changes:
+            return [], []
+        return self.scanner.scan_changed(changes)
+
+    def _titledb_stamp(self):
+        db_dir = self.nswdb_path.parent or Path('.')
+        stamp = []
+        for fname in NSWDBParser.DB_FILES:
+            try:
+                st = (db_dir / fname).stat()
+                stamp.append((fname, st.st_size, st.st_mtime_ns))
+            except OSError:
+                stamp.append((fname, None, None))
+        return tuple(stamp)
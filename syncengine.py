@@ -1,22 +1,69 @@
+import json
+import os
 import shutil
+import threading
+import time
 import zipfile
+import zlib
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
-from models import SaveEntry, Config
+from typing import Dict, List, Optional, Tuple
+from models import SaveEntry, Config, SyncResult
+from save_manifest import EXTRA_DATA_NAMES, iter_files, file_digest, build_manifest, strip_extra_data
+from fastcopy import clone_file, link_or_clone
+from blob_store import BlobStore, write_manifest, read_manifest
+from backup_index import BackupIndex
+import content_hash
 import re
 
 def sanitize_filename(name: str) -> str:
     # Replace invalid characters with underscore or strip them
     return re.sub(r'[<>:"/\\|?*™]', '_', name)
 
+# Config.backup_compression -> zipfile method
+ZIP_METHODS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+PROBE_SAMPLE = 64 * 1024
+PROBE_MIN_SAVING = 0.05  # store files whose probe sample shrinks by less than 5%
+
+def is_compressible(path: Path, size: int) -> bool:
+    """Cheap compressibility probe: zlib level 1 over a sample from the start (and middle) of the file.
+
+    Saves that are already compressed or encrypted barely shrink, and deflating
+    them in full only costs CPU.
+    """
+    try:
+        with open(path, 'rb') as fh:
+            sample = fh.read(PROBE_SAMPLE)
+            if size > 4 * PROBE_SAMPLE:
+                fh.seek(size // 2)
+                sample += fh.read(PROBE_SAMPLE)
+    except OSError:
+        return True  # let the archiver report the error
+    if not sample:
+        return False
+    return len(zlib.compress(sample, 1)) <= len(sample) * (1 - PROBE_MIN_SAVING)
+
 class SyncEngine:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, hash_cache=None):
         self.config = config
         self.backup_dir = config.backup_dir
         self.backup_dir.mkdir(exist_ok=True, parents=True)
+        # Optional HashCache shared with the scanner so delta syncs don't re-read unchanged files
+        self.hash_cache = hash_cache
+        # Content-addressed store for deduplicated backups (Config.dedup_backups). It is always
+        # available for retention/GC so switching the option off doesn't orphan existing blobs.
+        self.blob_store = BlobStore(self.backup_dir / '.blobs')
+        # One lock per backupHistory/<title> folder: its archives and index.json are
+        # read-modify-write, and Ryujinx/Citron backups of a title may run concurrently
+        self._folder_locks = {}
+        self._folder_locks_guard = threading.Lock()
 
-    def sync(self, source: SaveEntry, destination: SaveEntry):
+    def sync(self, source: SaveEntry, destination: SaveEntry) -> SyncResult:
         """
         Sync source save to destination.
 
@@ -24,70 +71,253 @@ class SyncEngine:
         - When copying from Citron -> Ryujinx we exclude ExtraData0/ExtraData1 files.
         - When the destination is a Ryujinx slot folder we back up and copy into *all* numeric
           sibling slots under the same Ryujinx folder (so both '0' and '1' are updated).
+          Only changed files are written to the first slot, and the other slots are filled
+          from it; slots with identical contents share one backup archive.
+        - Destinations whose content fingerprint already equals the source's (after the
+          ExtraData exclusion) are left alone: no backup, no copy. If nothing needs writing
+          the result status is 'skipped'.
         """
         print(f"[SYNC] {source.game_name}: {source.source} → {destination.source}")
 
         exclude_extra = (source.source == 'citron' and destination.source == 'ryujinx')
+        source_fp = self._tree_fingerprint(source.path, exclude_extra)
 
         # If destination is a Ryujinx per-slot path ( .../save/<fid>/<slot> ), copy into all
         # numeric sibling slots we find under the same <fid> directory.
-        try:
-            if destination.source == 'ryujinx' and destination.path.name.isdigit():
-                slot_parent = destination.path.parent
-                slot_dirs = [p for p in slot_parent.iterdir() if p.is_dir() and p.name.isdigit()]
-                # If no numeric siblings found, fall back to the single destination path
-                if not slot_dirs:
-                    slot_dirs = [destination.path]
-
-                # Back up each existing slot before replacing
-                for sd in slot_dirs:
-                    sd_entry = SaveEntry(destination.title_id, destination.game_name, destination.source,
-                                         destination.folder_id, sd, destination.modified_time, destination.hash)
-                    self._backup(sd_entry)
-
-                # Copy source into each discovered slot
-                for sd in slot_dirs:
-                    self._copy_save(source.path, sd, exclude_extra)
-                return
-        except Exception:
-            # Fall back to single-slot behavior on unexpected errors
-            pass
+        slot_dirs = []
+        if destination.source == 'ryujinx' and destination.path.name.isdigit():
+            try:
+                slot_dirs = [p for p in destination.path.parent.iterdir() if p.is_dir() and p.name.isdigit()]
+            except OSError:
+                # Slots cannot be listed: fall back to the single destination path
+                slot_dirs = []
+
+        if slot_dirs:
+            # Group slots by content: identical siblings share a backup, and slots that
+            # already match the source are skipped entirely
+            by_content = {}
+            for sd in slot_dirs:
+                by_content.setdefault(self._tree_fingerprint(sd), []).append(sd)
+            if source_fp is not None:
+                up_to_date = by_content.pop(source_fp, [])
+                if up_to_date:
+                    print(f"  ℹ️ Slot(s) {', '.join(d.name for d in up_to_date)} already match the source")
+            if not by_content:
+                print("  ✔ Already in sync; nothing to do")
+                return SyncResult(destination.title_id, 'skipped')
+
+            # Back up each distinct slot state once
+            for dirs in by_content.values():
+                if len(dirs) > 1:
+                    print(f"  ℹ️ Slots {', '.join(d.name for d in dirs)} hold identical data; backing up once")
+                sd_entry = SaveEntry(destination.title_id, destination.game_name, destination.source,
+                                     destination.folder_id, dirs[0], destination.modified_time, destination.hash)
+                self._backup(sd_entry)
+
+            # Delta-stage the first slot from the source (only changed files are written),
+            # then fill any other slots from that local tree instead of re-reading the source
+            targets = sorted((d for dirs in by_content.values() for d in dirs), key=lambda d: d.name)
+            self._copy_save(source.path, targets[0], exclude_extra)
+            for sd in targets[1:]:
+                self._copy_save(targets[0], sd)
+            return SyncResult(destination.title_id, 'synced', targets)
 
         # Default single-destination behavior
+        if source_fp is not None and self._tree_fingerprint(destination.path) == source_fp:
+            print("  ✔ Already in sync; nothing to do")
+            return SyncResult(destination.title_id, 'skipped')
         self._backup(destination)
         self._copy_save(source.path, destination.path, exclude_extra)
+        return SyncResult(destination.title_id, 'synced', [destination.path])
+
+    def _tree_fingerprint(self, directory: Path, exclude_extra: bool = False) -> Optional[str]:
+        """Content fingerprint of a save folder (None when it is missing or empty).
+
+        With `exclude_extra`, ExtraData0/ExtraData1 are left out — i.e. the fingerprint of
+        what a Citron -> Ryujinx copy would write.
+        """
+        if not directory.is_dir():
+            return None
+        algorithm = self._hash_algorithm()
+        manifest = build_manifest(directory, algorithm, self.hash_cache)
+        if exclude_extra:
+            manifest = strip_extra_data(manifest)
+        return content_hash.fingerprint(manifest, algorithm) if manifest else None
+
+    def _backup(self, save: SaveEntry, enforce_limit: bool = True) -> Optional[Path]:
+        """Archive `save` into its backupHistory title folder; returns the new backup, or None if skipped.
 
-    def _backup(self, save: SaveEntry):
+        Bulk callers pass enforce_limit=False and call enforce_retention() per title afterwards.
+        """
         # Don't attempt to back up a destination that doesn't yet exist or is empty
         if not save.path.exists():
             print(f"  ℹ️ No existing destination to back up at {save.path}; skipping backup.")
-            return
+            return None
 
-        # Collect files once to avoid a race where the directory changes between checks
-        files = [f for f in save.path.rglob("*") if f.is_file()]
+        # Collect files once (with their stat) to avoid a race where the directory changes
+        # between checks; the fingerprint, the archive and the index all use this listing
+        files = list(iter_files(save.path))
         if not files:
             print(f"  ℹ️ No files found to back up in {save.path}; skipping backup.")
-            return
+            return None
 
-        safe_name = sanitize_filename(save.game_name)
-        title_folder = self.backup_dir / f"{save.title_id}-{safe_name}"
+        title_folder = self.title_backup_folder(save.title_id, save.game_name)
         title_folder.mkdir(exist_ok=True, parents=True)
 
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        zip_path = title_folder / f"saveBackup_{timestamp}.zip"
+        algorithm = self._hash_algorithm()
+        manifest = build_manifest(save.path, algorithm, self.hash_cache, files)
+        fp = content_hash.fingerprint(manifest, algorithm)
+
+        with self._folder_lock(title_folder):
+            index = BackupIndex(title_folder, algorithm)
+            latest = index.latest(save.source)
+            if latest is not None and latest.get('fingerprint') == fp:
+                print(f"  ℹ️ Latest backup {latest['name']} already holds this state; skipping backup.")
+                return None
+
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            if getattr(self.config, 'dedup_backups', False):
+                backup_path = self._unique_backup_path(title_folder, timestamp, '.json')
+                self._backup_to_store(save, files, backup_path)
+            else:
+                backup_path = self._unique_backup_path(title_folder, timestamp, '.zip')
+                method, level, probe = self._zip_compression()
+
+                stored = 0
+                with zipfile.ZipFile(backup_path, 'w', method, compresslevel=level) as zipf:
+                    # Enough metadata to rebuild index.json without rehashing the archive
+                    zipf.comment = json.dumps({'source': save.source, 'fingerprint': fp}).encode('utf-8')
+                    for arcname, file, st in files:
+                        compress_type = method
+                        if probe and method != zipfile.ZIP_STORED and not is_compressible(file, st.st_size):
+                            compress_type = zipfile.ZIP_STORED
+                            stored += 1
+                        zipf.write(file, arcname, compress_type=compress_type)
+
+                detail = f" ({stored} incompressible file(s) stored)" if stored else ""
+                print(f"  ✔ Backed up {len(files)} file(s) to {backup_path}{detail}")
+
+            index.add({
+                'name': backup_path.name,
+                'created': time.time(),
+                'source': save.source,
+                'size': sum(size for size, _ in manifest.values()),
+                'file_count': len(manifest),
+                'archive_size': backup_path.stat().st_size,
+                'fingerprint': fp,
+            })
+            if enforce_limit:
+                self._enforce_backup_limit(index, self.config.max_backups)
+            else:
+                index.save()
+        return backup_path
+
+    def enforce_retention(self, title_id: str, game_name: str, collect_garbage: bool = True) -> bool:
+        """Apply Config.max_backups to one title's backups (after a bulk backup).
+
+        Returns True if a deduplicated backup was dropped, i.e. blob GC may have work to do.
+        """
+        folder = self.title_backup_folder(title_id, game_name)
+        if not folder.is_dir():
+            return False
+        with self._folder_lock(folder):
+            index = BackupIndex(folder, self._hash_algorithm())
+            return self._enforce_backup_limit(index, self.config.max_backups, collect_garbage)
+
+    def list_backups(self, title_id: str, game_name: str) -> List[Dict]:
+        """Index records for a title's backups, newest first (see backup_index.py)."""
+        folder = self.title_backup_folder(title_id, game_name)
+        if not folder.is_dir():
+            return []
+        with self._folder_lock(folder):
+            return list(reversed(BackupIndex(folder, self._hash_algorithm()).backups))
+
+    def title_backup_folder(self, title_id: str, game_name: str) -> Path:
+        return self.backup_dir / f"{title_id}-{sanitize_filename(game_name)}"
+
+    def _unique_backup_path(self, folder: Path, timestamp: str, suffix: str) -> Path:
+        # Two backups of one title within a second (Ryujinx + Citron) must not overwrite each other
+        path = folder / f"saveBackup_{timestamp}{suffix}"
+        n = 2
+        while path.exists():
+            path = folder / f"saveBackup_{timestamp}-{n}{suffix}"
+            n += 1
+        return path
+
+    def _folder_lock(self, folder: Path) -> threading.Lock:
+        with self._folder_locks_guard:
+            return self._folder_locks.setdefault(str(folder), threading.Lock())
+
+    def _hash_algorithm(self) -> str:
+        return getattr(self.config, 'hash_algorithm', None) or content_hash.DEFAULT_ALGORITHM
+
+    def _zip_compression(self) -> Tuple[int, Optional[int], bool]:
+        """(zipfile method, compresslevel, probe files first) from Config."""
+        name = getattr(self.config, 'backup_compression', 'deflate') or 'deflate'
+        method = ZIP_METHODS.get(name)
+        if method is None:
+            print(f"  ⚠️ Unknown backup_compression {name!r}; using deflate")
+            method = zipfile.ZIP_DEFLATED
+        level = getattr(self.config, 'backup_compresslevel', None)
+        if method in (zipfile.ZIP_STORED, zipfile.ZIP_LZMA):
+            level = None  # zipfile ignores/rejects a level for these
+        return method, level, bool(getattr(self.config, 'backup_probe_compression', True))
 
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file in files:
-                arcname = file.relative_to(save.path)
-                zipf.write(file, arcname)
+    def _backup_to_store(self, save: SaveEntry, listing, manifest_path: Path):
+        """Deduplicated backup: file contents go to the blob store, the backup itself is a manifest."""
+        algorithm = self._hash_algorithm()
+        files = {}
+        new_blobs = stored = 0
+        try:
+            for rel, path, st in listing:
+                # A cached digest lets unchanged files skip the read entirely when their blob exists
+                known = self.hash_cache.lookup(save.path, rel, st, algorithm) if self.hash_cache else None
+                digest, is_new = self.blob_store.store_file(path, algorithm, known)
+                files[rel] = [st.st_size, digest]
+                if is_new:
+                    new_blobs += 1
+                    stored += st.st_size
+            write_manifest(manifest_path, {
+                'title_id': save.title_id,
+                'game_name': save.game_name,
+                'source': save.source,
+                'path': str(save.path),
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'algorithm': algorithm,
+            }, files)
+        finally:
+            self.blob_store.release(d for _, d in files.values())
+        print(f"  ✔ Backed up {len(files)} file(s) to {manifest_path} "
+              f"({new_blobs} new blob(s), {stored} byte(s) stored)")
 
-        print(f"  ✔ Backed up {len(files)} file(s) to {zip_path}")
-        self._enforce_backup_limit(title_folder, self.config.max_backups)
+    def _enforce_backup_limit(self, index: BackupIndex, max_versions: int, collect_garbage: bool = True) -> bool:
+        """Drop the oldest backups beyond `max_versions` using only the index, then save it."""
+        dropped_manifest = False
+        for old in index.backups[:max(0, len(index.backups) - max_versions)]:
+            (index.folder / old['name']).unlink(missing_ok=True)
+            index.remove(old['name'])
+            dropped_manifest |= old['name'].endswith('.json')
+        index.save()
+        if dropped_manifest and collect_garbage:
+            self._collect_blob_garbage()
+        return dropped_manifest
 
-    def _enforce_backup_limit(self, folder: Path, max_versions: int):
-        zips = sorted(folder.glob("saveBackup_*.zip"), key=lambda p: p.stat().st_mtime, reverse=True)
-        for old_zip in zips[max_versions:]:
-            old_zip.unlink()
+    def _collect_blob_garbage(self):
+        """Delete blobs no longer referenced by any backup manifest of any title."""
+        def referenced():
+            digests = set()
+            for manifest_path in self.backup_dir.glob("*/saveBackup_*.json"):
+                digests.update(digest for _, digest in read_manifest(manifest_path)['files'].values())
+            return digests
+
+        try:
+            removed, freed = self.blob_store.collect_garbage(referenced)
+        except Exception as e:
+            # Never delete blobs we cannot prove are unused
+            print(f"  ⚠️ Skipped backup garbage collection: {e}")
+            return
+        if removed:
+            print(f"  ✔ Removed {removed} unreferenced backup blob(s) ({freed} byte(s))")
 
     def _is_safe_destination(self, dst: Path) -> bool:
         try:
@@ -116,22 +346,184 @@ class SyncEngine:
 
         timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
         tmp = dst.parent / f".sync_tmp_{dst.name}_{timestamp}"
-        old = dst.parent / f".sync_old_{dst.name}_{timestamp}"
 
         # Ensure clean temp
         if tmp.exists():
             shutil.rmtree(tmp)
 
-        # Prepare ignore rule when we must not copy ExtraData files
-        ignore = None
-        if exclude_extra:
-            ignore = shutil.ignore_patterns("ExtraData0", "ExtraData1")
+        try:
+            if getattr(self.config, 'delta_sync', True):
+                # Write only new/changed files; reuse unchanged destination files by hardlink
+                copied, reused = self._stage_delta(src, dst, tmp, exclude_extra)
+                detail = f" ({copied} file(s) written, {reused} unchanged)"
+            else:
+                # Prepare ignore rule when we must not copy ExtraData files
+                ignore = shutil.ignore_patterns(*EXTRA_DATA_NAMES) if exclude_extra else None
+                # Copy to temporary location first (apply ignore if requested)
+                shutil.copytree(src, tmp, ignore=ignore)
+                detail = ""
+        except Exception:
+            # Never leave a half-staged tree behind; the destination is untouched at this point
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        self._promote_staging(tmp, dst, timestamp)
+        print(f"  ✔ Save copied to {dst}{detail}")
 
-        # Copy to temporary location first (apply ignore if requested)
-        if ignore:
-            shutil.copytree(src, tmp, ignore=ignore)
+    def restore(self, target: SaveEntry, backup_name: str) -> SyncResult:
+        """Replace the save at `target.path` with the contents of one of its title's backups.
+
+        The archive (zip or deduplicated manifest) is streamed straight into a staging
+        folder next to the destination, checked against the fingerprint recorded in the
+        backup index, and swapped in with the same rename as a sync. The current contents
+        are backed up first (unless the latest backup already holds them).
+        Like sync(), a Ryujinx slot target restores into every numeric sibling slot, so
+        the slots never end up holding different saves.
+        """
+        dst = target.path
+        if not self._is_safe_destination(dst):
+            raise RuntimeError(f"Refusing to write outside known emulator roots: {dst}")
+        folder = self.title_backup_folder(target.title_id, target.game_name)
+        with self._folder_lock(folder):
+            index = BackupIndex(folder, self._hash_algorithm())
+        record = next((b for b in index.backups if b['name'] == backup_name), None)
+        if record is None:
+            raise FileNotFoundError(f"No backup named {backup_name} for {target.title_id}")
+        print(f"[RESTORE] {target.game_name}: {backup_name} → {dst}")
+
+        slot_dirs = [dst]
+        if target.source == 'ryujinx' and dst.name.isdigit() and dst.parent.is_dir():
+            slot_dirs = sorted((p for p in dst.parent.iterdir() if p.is_dir() and p.name.isdigit()),
+                               key=lambda p: p.name) or [dst]
+
+        algorithm = content_hash.digest_algorithm(record.get('fingerprint') or '') or self._hash_algorithm()
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        if len(slot_dirs) > 1:
+            # Shared payload the slots are filled from, as in a multi-slot sync
+            tmp = dst.parent / f".sync_payload_{timestamp}"
         else:
-            shutil.copytree(src, tmp)
+            tmp = dst.parent / f".sync_tmp_{dst.name}_{timestamp}"
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        try:
+            archive = folder / backup_name
+            if archive.suffix == '.json':
+                manifest = self._stage_from_store(archive, tmp, algorithm)
+            else:
+                manifest = self._stage_from_zip(archive, tmp, algorithm)
+            expected = record.get('fingerprint')
+            actual = content_hash.fingerprint(manifest, algorithm) if manifest else None
+            if expected is not None and actual != expected:
+                raise ValueError(f"Backup {backup_name} does not match its recorded fingerprint; not restoring")
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        if len(slot_dirs) == 1:
+            self._backup(target)
+            self._promote_staging(tmp, dst, timestamp)
+            print(f"  ✔ Restored {len(manifest)} file(s) to {dst}")
+            return SyncResult(target.title_id, 'restored', [dst])
+
+        try:
+            # Back up each distinct slot state once, then fill every slot from the payload
+            by_content = {}
+            for sd in slot_dirs:
+                by_content.setdefault(self._tree_fingerprint(sd), []).append(sd)
+            for dirs in by_content.values():
+                self._backup(SaveEntry(target.title_id, target.game_name, target.source,
+                                       target.folder_id, dirs[0], target.modified_time, target.hash))
+            for sd in slot_dirs:
+                self._copy_save(tmp, sd)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print(f"  ✔ Restored {len(manifest)} file(s) to slot(s) {', '.join(d.name for d in slot_dirs)}")
+        return SyncResult(target.title_id, 'restored', slot_dirs)
+
+    def _stage_from_zip(self, archive: Path, tmp: Path, algorithm: str) -> Dict[str, Tuple[int, str]]:
+        """Extract a zip backup into `tmp` member by member, hashing while writing (constant memory)."""
+        manifest = {}
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                rel = Path(info.filename)
+                if rel.is_absolute() or '..' in rel.parts:
+                    raise ValueError(f"Unsafe path in backup archive: {info.filename}")
+                target = tmp / rel
+                if info.is_dir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with zf.open(info) as src, open(target, 'wb') as out:
+                    digest, size = content_hash.copy_and_hash(src, out, algorithm)
+                mtime = datetime(*info.date_time).timestamp()
+                os.utime(target, (mtime, mtime))
+                manifest[rel.as_posix()] = (size, digest)
+        return manifest
+
+    def _stage_from_store(self, manifest_path: Path, tmp: Path, algorithm: str) -> Dict[str, Tuple[int, str]]:
+        """Materialize a deduplicated backup into `tmp` from the blob store, hashing each blob as it is copied.
+
+        The returned manifest holds the digests of the bytes actually written, so the
+        caller's fingerprint check catches a blob whose content no longer matches its name.
+        """
+        manifest = {}
+        for rel, (size, digest) in read_manifest(manifest_path)['files'].items():
+            rel_path = Path(rel)
+            if rel_path.is_absolute() or '..' in rel_path.parts:
+                raise ValueError(f"Unsafe path in backup manifest: {rel}")
+            blob = self.blob_store.blob_path(digest)
+            if not blob.is_file():
+                raise FileNotFoundError(f"Backup blob for {rel} is missing: {blob}")
+            target = tmp / rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(blob, 'rb', buffering=0) as src, open(target, 'wb') as out:
+                actual, written = content_hash.copy_and_hash(src, out, content_hash.digest_algorithm(digest) or algorithm)
+            if actual != digest or written != size:
+                raise ValueError(f"Backup blob for {rel} is damaged: {blob}")
+            manifest[rel] = (written, actual)
+        return manifest
+
+    def _stage_delta(self, src: Path, dst: Path, tmp: Path, exclude_extra: bool) -> Tuple[int, int]:
+        """Build `tmp` as a copy of `src`, linking in files `dst` already holds with identical content.
+
+        A destination file is reused when its size and digest match the source file; only
+        those files are hashed (through the shared hash cache when available).
+        Returns (files written, files reused).
+        """
+        algorithm = self._hash_algorithm()
+        excluded = EXTRA_DATA_NAMES if exclude_extra else frozenset()
+        dst_files = {rel: st for rel, _, st in iter_files(dst)} if dst.is_dir() else {}
+
+        copied = reused = 0
+        for dirpath, dirnames, filenames in os.walk(src):
+            dirnames[:] = [d for d in dirnames if d not in excluded]
+            rel_dir = Path(dirpath).relative_to(src)
+            (tmp / rel_dir).mkdir(parents=True, exist_ok=True)
+            for name in filenames:
+                if name in excluded:
+                    continue
+                rel = (rel_dir / name).as_posix()
+                src_file = src / rel
+                staged = tmp / rel
+                dst_st = dst_files.get(rel)
+                if dst_st is not None:
+                    src_st = src_file.stat()
+                    if dst_st.st_size == src_st.st_size:
+                        src_digest = file_digest(src, rel, src_st, algorithm, self.hash_cache)
+                        if src_digest is not None and src_digest == file_digest(dst, rel, dst_st, algorithm, self.hash_cache):
+                            link_or_clone(dst / rel, staged)
+                            # Same bytes; carry the source's timestamps like a copy would
+                            shutil.copystat(src_file, staged)
+                            reused += 1
+                            continue
+                clone_file(src_file, staged)
+                copied += 1
+        return copied, reused
+
+    def _promote_staging(self, tmp: Path, dst: Path, timestamp: str):
+        """Atomically swap a fully staged tree into place at `dst` and remove the previous copy."""
+        old = dst.parent / f".sync_old_{dst.name}_{timestamp}"
 
         # Move existing dst aside (if present)
         if dst.exists():
@@ -152,5 +544,3 @@ class SyncEngine:
                 shutil.rmtree(old)
             except Exception:
                 print(f"  ⚠️ Warning: failed to remove old destination {old}")
-
-        print(f"  ✔ Save copied to {dst}")